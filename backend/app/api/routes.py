@@ -1,28 +1,142 @@
 """
 API routes for order form extraction workflow.
 """
+import asyncio
 import os
+import re
+import secrets
 import shutil
+import time
 import uuid
-import httpx
 from pathlib import Path
-from fastapi import APIRouter, UploadFile, File, HTTPException, status
-from fastapi.responses import JSONResponse
-from typing import Optional
+from fastapi import APIRouter, UploadFile, File, Header, HTTPException, Query, Request, Response, status
+from fastapi.concurrency import run_in_threadpool
+from fastapi.responses import FileResponse, JSONResponse
+from typing import List, Optional
 from app.sheets.google_sheets import open_sheet
 
 from app.models.schemas import (
     OrderFormData,
     ExtractionResponse,
-    FinalSubmissionResponse
+    FinalSubmissionResponse,
+    StoredExtraction,
+    ExtractionPage,
+    SubmissionPage
 )
 
 from app.services.pdf_extraction_service import PDFExtractionService
+from app.services.gemini_service import async_http_client, chunk_cache, http_client, http_stats
+from app.services.llm_http import pool_snapshot
+from app.services.llm_metrics import llm_metrics
+from app.storage.results_store import results_store
 from app.core.config import settings
+from app.core.deadline import Deadline, ExtractionCancelled
+from app.core.scheduler import BULK, INTERACTIVE, current_caller, current_lane, extraction_scheduler, llm_scheduler
+from app.core.tracing import SamplingProfiler, SpanFileExporter, Trace, current_span, span, start_trace, write_profile
 
 
 router = APIRouter(prefix="/order-form", tags=["order-form"])
 
+span_exporter = SpanFileExporter(settings.span_export_path)
+
+
+def _persist_extraction(response: ExtractionResponse, source_filename: Optional[str]) -> ExtractionResponse:
+    """
+    Save an extraction response to the local results store.
+    A store failure is logged and never fails the request.
+    """
+    try:
+        results_store.save_extraction(response, source_filename)
+    except Exception as e:
+        print(f"Error saving extraction result: {str(e)}")
+    return response
+
+
+def _request_deadline(header_value: Optional[str], started: bool = True) -> Deadline:
+    """
+    Build the extraction deadline from the X-Request-Deadline header (seconds),
+    falling back to the configured default. With started=False the countdown
+    begins when the extraction is granted a worker slot.
+    """
+    timeout = settings.request_deadline_seconds
+    if header_value:
+        try:
+            requested = float(header_value)
+        except ValueError:
+            raise HTTPException(
+                status_code=status.HTTP_400_BAD_REQUEST,
+                detail="X-Request-Deadline must be a number of seconds"
+            )
+        if requested > 0:
+            timeout = min(requested, settings.max_request_deadline_seconds)
+    return Deadline(timeout, started)
+
+
+async def _cancel_on_disconnect(request: Request, deadline: Deadline, poll_interval: float = 0.5) -> None:
+    """
+    Cancel the deadline as soon as the client disconnects.
+    """
+    while not deadline.expired():
+        if await request.is_disconnected():
+            deadline.cancel(Deadline.CLIENT_DISCONNECTED)
+            return
+        await asyncio.sleep(poll_interval)
+
+
+def _client_address(request: Request) -> str:
+    """
+    Return the client address, trusting X-Forwarded-For only from a configured proxy.
+    """
+    host = request.client.host if request.client else "anonymous"
+    forwarded_for = request.headers.get("x-forwarded-for")
+    if host not in settings.trusted_proxies or not forwarded_for:
+        return host
+    # Walk back from the nearest hop; the first untrusted address is the client
+    for address in reversed([part.strip() for part in forwarded_for.split(",") if part.strip()]):
+        if address not in settings.trusted_proxies:
+            return address
+    return host
+
+
+def _caller_id(request: Request, x_api_key: Optional[str]) -> str:
+    """
+    Identify the caller for per-caller quotas: the caller named by a configured
+    X-API-Key, else the client address.
+    """
+    if x_api_key:
+        for key, caller in settings.caller_api_keys.items():
+            if secrets.compare_digest(x_api_key.encode(), key.encode()):
+                return caller
+        raise HTTPException(
+            status_code=status.HTTP_401_UNAUTHORIZED,
+            detail="Unknown API key"
+        )
+    return _client_address(request)
+
+
+def _require_admin(token: Optional[str]) -> None:
+    """
+    Reject the request unless it carries the configured admin token.
+    """
+    if not settings.admin_token or not token or not secrets.compare_digest(token, settings.admin_token):
+        raise HTTPException(
+            status_code=status.HTTP_403_FORBIDDEN,
+            detail="Admin token required"
+        )
+
+
+def _store_profile(trace: Trace, profiler: Optional[SamplingProfiler]) -> None:
+    """
+    Write a profiled request's span tree and samples to disk and export its spans.
+    """
+    try:
+        path = write_profile(trace, profiler, settings.profile_folder)
+        span_exporter.export(trace)
+        print(f"Request profile stored at {path}")
+    except Exception as e:
+        print(f"Error storing request profile: {str(e)}")
+
+
 @router.get("/sheet-title")
 async def get_sheet_title():
     """
@@ -38,16 +152,17 @@ async def get_sheet_title():
         )
 
 
-@router.post("/upload", response_model=ExtractionResponse)
-async def upload_and_extract(file: UploadFile = File(...)):
+async def _extract_upload(
+    request: Request,
+    file: UploadFile,
+    deadline: Deadline,
+    lane: str = INTERACTIVE,
+    caller: str = "anonymous"
+) -> ExtractionResponse:
     """
-    Upload a PDF order form and extract information from it.
-    
-    Args:
-        file: PDF file to upload
-        
-    Returns:
-        ExtractionResponse: Extracted order form data
+    Save the uploaded PDF, extract it within the deadline and persist the result.
+    Extraction waits for a worker slot in the given scheduler lane; a deadline
+    that has not started yet starts once the slot is granted.
     """
     try:
         file_ext = Path(file.filename).suffix.lower()
@@ -60,38 +175,69 @@ async def upload_and_extract(file: UploadFile = File(...)):
         unique_filename = f"{uuid.uuid4()}{file_ext}"
         file_path = settings.upload_folder / unique_filename
         
-        with open(file_path, "wb") as buffer:
+        with span("file.write"), open(file_path, "wb") as buffer:
             shutil.copyfileobj(file.file, buffer)
         
         try:
-            raw_text, structured_data = PDFExtractionService.extract_order_form_data(
-                str(file_path),
-                use_ai=True
-            )
+            watcher = asyncio.create_task(_cancel_on_disconnect(request, deadline))
+            try:
+                queued_at = time.perf_counter()
+                async with extraction_scheduler.slot_async(lane, caller, deadline):
+                    request_span = current_span()
+                    if request_span is not None:
+                        request_span.set_attribute("queue_wait_ms", round((time.perf_counter() - queued_at) * 1000, 3))
+                    deadline.start()
+                    deadline.check()
+                    current_lane.set(lane)
+                    current_caller.set(caller)
+                    raw_text, structured_data = await run_in_threadpool(
+                        PDFExtractionService.extract_order_form_data,
+                        str(file_path),
+                        use_ai=True,
+                        deadline=deadline
+                    )
+            finally:
+                watcher.cancel()
             
             try:
-                order_form_data = OrderFormData(**structured_data)
+                with span("validate"):
+                    order_form_data = OrderFormData(**structured_data)
             except Exception as e:
-                return ExtractionResponse(
+                return _persist_extraction(ExtractionResponse(
                     success=True,
                     data=None,
                     message=f"Extraction completed but validation failed: {str(e)}",
-                    raw_text=raw_text[:1000] if len(raw_text) > 1000 else raw_text 
-                )
+                    raw_text=raw_text[:1000] if len(raw_text) > 1000 else raw_text,
+                    section_tiers=structured_data.get("section_tiers")
+                ), file.filename)
             
             print(order_form_data)
-            return ExtractionResponse(
+            return _persist_extraction(ExtractionResponse(
                 success=True,
                 data=order_form_data,
                 message="PDF extracted successfully",
-                raw_text=None
-            )
+                raw_text=None,
+                section_tiers=structured_data.get("section_tiers")
+            ), file.filename)
         finally:
             if file_path.exists():
                 os.remove(file_path)
                 
     except HTTPException:
         raise
+    except ExtractionCancelled as e:
+        llm_metrics.record_cancellation(e.reason)
+        if e.reason == Deadline.QUEUE_TIMEOUT:
+            raise HTTPException(
+                status_code=status.HTTP_503_SERVICE_UNAVAILABLE,
+                detail="No extraction worker became free before the request deadline"
+            )
+        if e.reason == Deadline.DEADLINE_EXCEEDED:
+            raise HTTPException(
+                status_code=status.HTTP_504_GATEWAY_TIMEOUT,
+                detail="Extraction did not finish before the request deadline"
+            )
+        raise HTTPException(status_code=499, detail="Client closed request")
     except Exception as e:
         raise HTTPException(
             status_code=status.HTTP_500_INTERNAL_SERVER_ERROR,
@@ -99,6 +245,104 @@ async def upload_and_extract(file: UploadFile = File(...)):
         )
 
 
+
+
+@router.post("/upload", response_model=ExtractionResponse)
+async def upload_and_extract(
+    request: Request,
+    file: UploadFile = File(...),
+    profile: bool = Query(False, description="Capture a span tree and sampling profile (admin only)"),
+    x_request_deadline: Optional[str] = Header(None),
+    x_admin_token: Optional[str] = Header(None),
+    x_api_key: Optional[str] = Header(None)
+):
+    """
+    Upload a PDF order form and extract information from it.
+    Extraction stops early if the client disconnects or the deadline passes.
+    
+    Args:
+        file: PDF file to upload
+        profile: Profile this request; the profile id is returned in X-Profile-Id
+        x_request_deadline: Optional deadline override in seconds
+        x_admin_token: Admin token, required when profile is set
+        x_api_key: Optional API key identifying the caller for per-caller quotas
+        
+    Returns:
+        ExtractionResponse: Extracted order form data
+    """
+    deadline = _request_deadline(x_request_deadline)
+    caller = _caller_id(request, x_api_key)
+    if not profile:
+        return await _extract_upload(request, file, deadline, INTERACTIVE, caller)
+
+    _require_admin(x_admin_token)
+    trace = profiler = None
+    try:
+        with start_trace("order-form.upload", filename=file.filename) as trace, \
+                SamplingProfiler(trace) as profiler:
+            result = await _extract_upload(request, file, deadline, INTERACTIVE, caller)
+            with span("serialize"):
+                content = result.model_dump_json()
+    finally:
+        if trace is not None:
+            _store_profile(trace, profiler)
+
+    return Response(
+        content=content,
+        media_type="application/json",
+        headers={"X-Profile-Id": trace.trace_id}
+    )
+
+
+@router.post("/batch/upload", response_model=List[ExtractionResponse])
+async def batch_upload_and_extract(
+    request: Request,
+    files: List[UploadFile] = File(...),
+    x_request_deadline: Optional[str] = Header(None),
+    x_api_key: Optional[str] = Header(None)
+):
+    """
+    Extract several PDF order forms for batch/API callers.
+    Runs in the bulk scheduler lane so it cannot crowd out interactive uploads;
+    each file gets its own deadline, counted from when it is granted a worker
+    slot, and a failure in one file does not fail the batch.
+    
+    Args:
+        files: PDF files to upload
+        x_request_deadline: Optional per-file deadline override in seconds
+        x_api_key: Optional API key identifying the caller for per-caller quotas
+        
+    Returns:
+        List[ExtractionResponse]: One result per file, in upload order
+    """
+    caller = _caller_id(request, x_api_key)
+
+    async def extract_one(file: UploadFile) -> ExtractionResponse:
+        try:
+            return await _extract_upload(
+                request, file, _request_deadline(x_request_deadline, started=False), BULK, caller
+            )
+        except HTTPException as e:
+            return ExtractionResponse(success=False, message=f"{file.filename}: {e.detail}")
+
+    return await asyncio.gather(*(extract_one(file) for file in files))
+
+
+@router.get("/profiles/{profile_id}")
+async def download_profile(profile_id: str, x_admin_token: Optional[str] = Header(None)):
+    """
+    Download a stored request profile (span tree and folded stacks).
+    """
+    _require_admin(x_admin_token)
+    profile_path = settings.profile_folder / f"{profile_id}.json"
+    if not re.fullmatch(r"[0-9a-f]{32}", profile_id) or not profile_path.exists():
+        raise HTTPException(
+            status_code=status.HTTP_404_NOT_FOUND,
+            detail=f"Profile {profile_id} not found"
+        )
+    return FileResponse(profile_path, media_type="application/json", filename=profile_path.name)
+
+
 @router.post("/submit", response_model=FinalSubmissionResponse)
 async def submit_final_data(order_data: OrderFormData):
     try:
@@ -110,7 +354,7 @@ async def submit_final_data(order_data: OrderFormData):
             row,
             value_input_option="USER_ENTERED"
         )
-        return FinalSubmissionResponse(
+        response = FinalSubmissionResponse(
             success=True,
             message="Order data appended to Google Sheet successfully",
             submitted_data=order_data,
@@ -122,6 +366,119 @@ async def submit_final_data(order_data: OrderFormData):
             detail=f"Sheet insert failed: {repr(e)}"
         )
 
+    try:
+        results_store.save_submission(response)
+    except Exception as e:
+        print(f"Error saving submission result: {str(e)}")
+    return response
+
+
+@router.get("/extractions", response_model=ExtractionPage)
+async def list_extractions(
+    dsp_fein: Optional[str] = None,
+    dsp_code: Optional[str] = None,
+    term_start_from: Optional[str] = Query(None, description="Earliest initial term start date (YYYY-MM-DD)"),
+    term_start_to: Optional[str] = Query(None, description="Latest initial term start date (YYYY-MM-DD)"),
+    created_from: Optional[str] = Query(None, description="Earliest extraction time (ISO 8601 date or datetime, UTC if no offset)"),
+    created_to: Optional[str] = Query(None, description="Latest extraction time (ISO 8601; a date covers the whole day)"),
+    page: int = Query(1, ge=1),
+    page_size: int = Query(20, ge=1, le=100),
+):
+    """
+    Query stored extraction results without touching Gemini.
+    """
+    try:
+        items, total = results_store.query_extractions(
+            dsp_fein=dsp_fein,
+            dsp_code=dsp_code,
+            term_start_from=term_start_from,
+            term_start_to=term_start_to,
+            created_from=created_from,
+            created_to=created_to,
+            page=page,
+            page_size=page_size,
+        )
+    except ValueError as e:
+        raise HTTPException(
+            status_code=status.HTTP_400_BAD_REQUEST,
+            detail=f"Invalid filter: {str(e)}"
+        )
+    return ExtractionPage(items=items, page=page, page_size=page_size, total=total)
+
+
+@router.get("/extractions/{extraction_id}", response_model=StoredExtraction)
+async def get_extraction(extraction_id: str):
+    """
+    Fetch a single stored extraction result.
+    """
+    stored = results_store.get_extraction(extraction_id)
+    if stored is None:
+        raise HTTPException(
+            status_code=status.HTTP_404_NOT_FOUND,
+            detail=f"Extraction {extraction_id} not found"
+        )
+    return stored
+
+
+@router.get("/submissions", response_model=SubmissionPage)
+async def list_submissions(
+    dsp_fein: Optional[str] = None,
+    dsp_code: Optional[str] = None,
+    term_start_from: Optional[str] = Query(None, description="Earliest initial term start date (YYYY-MM-DD)"),
+    term_start_to: Optional[str] = Query(None, description="Latest initial term start date (YYYY-MM-DD)"),
+    submitted_from: Optional[str] = Query(None, description="Earliest submission time (ISO 8601 date or datetime, UTC if no offset)"),
+    submitted_to: Optional[str] = Query(None, description="Latest submission time (ISO 8601; a date covers the whole day)"),
+    page: int = Query(1, ge=1),
+    page_size: int = Query(20, ge=1, le=100),
+):
+    """
+    Query stored submissions without reading the Google Sheet.
+    """
+    try:
+        items, total = results_store.query_submissions(
+            dsp_fein=dsp_fein,
+            dsp_code=dsp_code,
+            term_start_from=term_start_from,
+            term_start_to=term_start_to,
+            submitted_from=submitted_from,
+            submitted_to=submitted_to,
+            page=page,
+            page_size=page_size,
+        )
+    except ValueError as e:
+        raise HTTPException(
+            status_code=status.HTTP_400_BAD_REQUEST,
+            detail=f"Invalid filter: {str(e)}"
+        )
+    return SubmissionPage(items=items, page=page, page_size=page_size, total=total)
+
+@router.get("/metrics/chunk-cache")
+async def get_chunk_cache_metrics():
+    """Size and hit ratio of the per-chunk Gemini result cache."""
+    return chunk_cache.stats()
+
+
+@router.get("/metrics/scheduler")
+async def get_scheduler_metrics():
+    """Per-lane queue depth, active slots and queue wait time."""
+    return {
+        "extraction": extraction_scheduler.snapshot(),
+        "llm": llm_scheduler.snapshot(),
+    }
+
+
+@router.get("/metrics/llm-http")
+async def get_llm_http_metrics():
+    """Gemini connection pool utilization and connection reuse rate."""
+    return pool_snapshot({"sync": http_client, "async": async_http_client}, http_stats)
+
+
+@router.get("/metrics/llm")
+async def get_llm_metrics():
+    """Per-model Gemini call, latency and cost counters."""
+    return llm_metrics.snapshot()
+
+
 @router.get("/health")
 async def health_check():
     """Health check endpoint."""
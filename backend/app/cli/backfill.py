@@ -0,0 +1,252 @@
+"""
+Resumable bulk backfill of historical order form PDFs.
+
+Walks a directory, extracts every PDF with PDFExtractionService in a pool
+of worker processes, and appends one JSON line per file to the output.
+Files already present in the output are skipped, so an interrupted run
+picks up where it stopped when started again with the same arguments.
+
+Usage:
+    python -m app.cli.backfill <directory> --output results.jsonl [--rows-output rows.csv]
+"""
+import argparse
+import csv
+import json
+import multiprocessing
+import os
+import sys
+import time
+from concurrent.futures import ProcessPoolExecutor, as_completed
+from pathlib import Path
+from typing import Dict, List, Optional, Set, Tuple
+
+from app.core.config import settings
+
+
+def find_pdfs(directory: Path) -> List[Path]:
+    """
+    Recursively list PDF files under directory in a stable order, as
+    resolved paths so checkpoints match however the directory is spelled.
+    """
+    return sorted(
+        path.resolve() for path in directory.rglob("*")
+        if path.is_file() and path.suffix.lower() in settings.allowed_extensions
+    )
+
+
+def _read_latest_records(output_path: Path) -> Tuple[Dict[str, Dict], List[str], bool]:
+    """
+    Read the output file keeping only the latest record per source.
+
+    Returns:
+        tuple: (latest record by resolved source, their lines in file order,
+        whether the file holds lines to drop: a partially written last line
+        or records superseded by a retry)
+    """
+    latest: Dict[str, Tuple[Dict, str]] = {}
+    stale = False
+    with open(output_path, "r", encoding="utf-8") as f:
+        for line in f:
+            try:
+                record = json.loads(line)
+            except json.JSONDecodeError:
+                stale = True
+                continue
+            source = str(Path(record["source"]).resolve())
+            if source in latest:
+                stale = True
+                del latest[source]
+            latest[source] = (record, line if line.endswith("\n") else line + "\n")
+    records = {source: record for source, (record, _) in latest.items()}
+    return records, [line for _, line in latest.values()], stale
+
+
+def compact_output(output_path: Path) -> None:
+    """
+    Rewrite the output file so each source keeps only its latest record.
+    """
+    if not output_path.exists():
+        return
+    _, lines, stale = _read_latest_records(output_path)
+    if stale:
+        with open(output_path, "w", encoding="utf-8") as f:
+            f.writelines(lines)
+
+
+def load_checkpoint(output_path: Path, retry_failed: bool) -> Set[str]:
+    """
+    Read the sources already processed from an existing output file.
+
+    A partially written last line (from an interrupted run) and records
+    superseded by a later retry are dropped from the file so that new
+    records append cleanly.
+    """
+    if not output_path.exists():
+        return set()
+
+    records, lines, stale = _read_latest_records(output_path)
+    if stale:
+        with open(output_path, "w", encoding="utf-8") as f:
+            f.writelines(lines)
+    return {
+        source for source, record in records.items()
+        if record.get("success") or not retry_failed
+    }
+
+
+def _init_worker(llm_slots) -> None:
+    from app.core.scheduler import BULK, current_caller, current_lane
+    from app.services.gemini_service import set_llm_concurrency_limiter
+    set_llm_concurrency_limiter(llm_slots)
+    current_lane.set(BULK)
+    current_caller.set("backfill")
+
+
+def process_file(path: str) -> Dict:
+    """
+    Extract and validate a single PDF. Runs in a worker process.
+    """
+    from app.models.schemas import OrderFormData
+    from app.services.pdf_extraction_service import PDFExtractionService
+
+    started = time.perf_counter()
+    record = {"source": path}
+    try:
+        # A Gemini failure (quota, network) must fail the record so that
+        # --retry-failed picks the file up again instead of keeping empty data.
+        _, structured_data = PDFExtractionService.extract_order_form_data(
+            path, use_ai=True, raise_on_llm_error=True
+        )
+        order_form_data = OrderFormData(**structured_data)
+        record["success"] = True
+        record["data"] = order_form_data.model_dump(mode="json")
+    except Exception as e:
+        record["success"] = False
+        record["error"] = str(e)
+    record["elapsed_s"] = round(time.perf_counter() - started, 3)
+    return record
+
+
+def _format_eta(seconds: float) -> str:
+    seconds = int(seconds)
+    return f"{seconds // 3600:02d}:{seconds % 3600 // 60:02d}:{seconds % 60:02d}"
+
+
+def _write_row(rows_writer, record: Dict) -> None:
+    from app.models.schemas import OrderFormData
+    from app.sheets.order_row_mapper import build_order_row
+
+    try:
+        rows_writer.writerow(build_order_row(OrderFormData(**record["data"])))
+    except Exception as e:
+        print(f"\nCould not build sheet row for {record['source']}: {str(e)}", file=sys.stderr)
+
+
+def run_backfill(
+    directory: Path,
+    output_path: Path,
+    rows_output_path: Optional[Path] = None,
+    workers: Optional[int] = None,
+    llm_concurrency: int = 4,
+    retry_failed: bool = False,
+) -> Dict[str, int]:
+    """
+    Run the backfill and return counts of processed, failed and skipped files.
+    """
+    pdfs = [str(path) for path in find_pdfs(directory)]
+    done = load_checkpoint(output_path, retry_failed)
+    pending = [path for path in pdfs if path not in done]
+    total = len(pending)
+    print(f"Found {len(pdfs)} PDFs, {len(pdfs) - total} already processed, {total} to go", file=sys.stderr)
+
+    counts = {"processed": 0, "failed": 0, "skipped": len(pdfs) - total}
+    if not pending:
+        return counts
+
+    rows_file = open(rows_output_path, "a", newline="", encoding="utf-8") if rows_output_path else None
+    rows_writer = csv.writer(rows_file) if rows_file else None
+
+    try:
+        with multiprocessing.Manager() as manager, \
+                open(output_path, "a", encoding="utf-8") as output:
+            llm_slots = manager.Semaphore(llm_concurrency)
+            started = time.perf_counter()
+
+            with ProcessPoolExecutor(
+                max_workers=workers or os.cpu_count(),
+                initializer=_init_worker,
+                initargs=(llm_slots,),
+            ) as pool:
+                futures = [pool.submit(process_file, path) for path in pending]
+                try:
+                    for future in as_completed(futures):
+                        record = future.result()
+                        output.write(json.dumps(record) + "\n")
+                        output.flush()
+
+                        counts["processed"] += 1
+                        if record["success"]:
+                            if rows_writer:
+                                _write_row(rows_writer, record)
+                                rows_file.flush()
+                        else:
+                            counts["failed"] += 1
+
+                        elapsed = time.perf_counter() - started
+                        rate = counts["processed"] / elapsed if elapsed else 0.0
+                        eta = (total - counts["processed"]) / rate if rate else 0.0
+                        print(
+                            f"\r[{counts['processed']}/{total}] {rate:.2f} files/s, "
+                            f"{counts['failed']} failed, ETA {_format_eta(eta)}",
+                            end="",
+                            file=sys.stderr,
+                            flush=True,
+                        )
+                except KeyboardInterrupt:
+                    for future in futures:
+                        future.cancel()
+                    print("\nInterrupted; re-run the same command to resume.", file=sys.stderr)
+                    raise
+                finally:
+                    if rows_file:
+                        rows_file.close()
+    finally:
+        # A retried file's new record supersedes its earlier failure
+        if retry_failed:
+            compact_output(output_path)
+
+    print(file=sys.stderr)
+    return counts
+
+
+def main(argv: Optional[List[str]] = None) -> int:
+    parser = argparse.ArgumentParser(description="Bulk-extract a directory of order form PDFs.")
+    parser.add_argument("directory", type=Path, help="Directory to scan recursively for PDFs")
+    parser.add_argument("--output", "-o", type=Path, required=True, help="JSON Lines results file (also the resume checkpoint)")
+    parser.add_argument("--rows-output", type=Path, help="Optional CSV of Google Sheet rows for bulk import")
+    parser.add_argument("--workers", type=int, default=None, help="Worker processes (default: CPU count)")
+    parser.add_argument("--llm-concurrency", type=int, default=4, help="Maximum concurrent Gemini calls across all workers")
+    parser.add_argument("--retry-failed", action="store_true", help="Re-run files that failed in a previous run")
+    args = parser.parse_args(argv)
+
+    if not args.directory.is_dir():
+        parser.error(f"{args.directory} is not a directory")
+
+    counts = run_backfill(
+        args.directory,
+        args.output,
+        rows_output_path=args.rows_output,
+        workers=args.workers,
+        llm_concurrency=args.llm_concurrency,
+        retry_failed=args.retry_failed,
+    )
+    print(
+        f"Done: {counts['processed']} processed, {counts['failed']} failed, "
+        f"{counts['skipped']} skipped",
+        file=sys.stderr,
+    )
+    return 1 if counts["failed"] else 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -10,21 +10,99 @@ BASE_DIR = Path(__file__).resolve().parent.parent.parent
 UPLOAD_FOLDER = BASE_DIR / "uploads"
 UPLOAD_FOLDER.mkdir(exist_ok=True)
 
+# Local store for extraction and submission results
+DATA_FOLDER = BASE_DIR / "data"
+DATA_FOLDER.mkdir(exist_ok=True)
+RESULTS_DB_PATH = Path(os.getenv("RESULTS_DB_PATH", str(DATA_FOLDER / "results.db")))
+
+# On-demand request profiling; disabled unless ADMIN_TOKEN is set
+ADMIN_TOKEN = os.getenv("ADMIN_TOKEN")
+PROFILE_FOLDER = DATA_FOLDER / "profiles"
+SPAN_EXPORT_PATH = Path(os.getenv("SPAN_EXPORT_PATH", str(DATA_FOLDER / "spans.jsonl")))
+
 
 ALLOWED_EXTENSIONS = {".pdf"}
 
 MAX_FILE_SIZE = 50 * 1024 * 1024
 
+# Per-request extraction deadline; clients may lower or raise it (up to the max)
+# with the X-Request-Deadline header, in seconds
+REQUEST_DEADLINE_SECONDS = float(os.getenv("REQUEST_DEADLINE_SECONDS", "120"))
+MAX_REQUEST_DEADLINE_SECONDS = float(os.getenv("MAX_REQUEST_DEADLINE_SECONDS", "600"))
+
 # Java Backend Configuration
 # These can be overridden by environment variables
 JAVA_API_URL = os.getenv("JAVA_API_URL", "http://localhost:8080/api")
 JAVA_API_KEY = os.getenv("JAVA_API_KEY", "hhfkshdkfhskdfhksfdshduf8584375hkhkhsdfy9dfsfdjsdft87fsdfsdhfkhhh9909865743dgtgdg")
 
+# Scheduling: worker slots and Gemini concurrency are shared between the
+# interactive lane (/upload) and the bulk lane (batch/API callers) by weight,
+# with a cap on concurrent slots per caller in each lane (0 disables the cap)
+EXTRACTION_WORKER_SLOTS = int(os.getenv("EXTRACTION_WORKER_SLOTS", "8"))
+LLM_CONCURRENCY = int(os.getenv("LLM_CONCURRENCY", "8"))
+LANE_WEIGHTS = {
+    "interactive": float(os.getenv("INTERACTIVE_LANE_WEIGHT", "4")),
+    "bulk": float(os.getenv("BULK_LANE_WEIGHT", "1")),
+}
+CALLER_QUOTAS = {
+    lane: quota for lane, quota in {
+        "interactive": int(os.getenv("INTERACTIVE_CALLER_QUOTA", "0")),
+        "bulk": int(os.getenv("BULK_CALLER_QUOTA", "4")),
+    }.items() if quota > 0
+}
+
+# Caller identity for the quotas: X-API-Key values map to named callers
+# (CALLER_API_KEYS="key1:name1,key2:name2"); other requests are keyed by
+# client address, taken from X-Forwarded-For only when the connection comes
+# from one of TRUSTED_PROXIES (comma-separated addresses)
+CALLER_API_KEYS = dict(
+    entry.strip().split(":", 1)
+    for entry in os.getenv("CALLER_API_KEYS", "").split(",") if ":" in entry
+)
+TRUSTED_PROXIES = {
+    address.strip() for address in os.getenv("TRUSTED_PROXIES", "").split(",") if address.strip()
+}
+
+# Gemini extraction settings
+GEMINI_MODEL = os.getenv("GEMINI_MODEL", "gemini-2.5-flash-lite")
+CHUNK_CACHE_MAX_ENTRIES = int(os.getenv("CHUNK_CACHE_MAX_ENTRIES", "512"))
+INPUT_COMPACTION_ENABLED = os.getenv("INPUT_COMPACTION_ENABLED", "true").lower() == "true"
+TABLE_PARSER_ENABLED = os.getenv("TABLE_PARSER_ENABLED", "true").lower() == "true"
+CHUNK_SIZE = int(os.getenv("CHUNK_SIZE", "5000"))
+
+# Model cascade: chunks that fail validation on GEMINI_MODEL are re-run on GEMINI_FALLBACK_MODEL
+LLM_CASCADE_ENABLED = os.getenv("LLM_CASCADE_ENABLED", "false").lower() == "true"
+GEMINI_FALLBACK_MODEL = os.getenv("GEMINI_FALLBACK_MODEL", "gemini-2.5-flash")
+
+# Hedged requests: fire a duplicate Gemini call once a call passes this latency
+# percentile, with hedges limited to LLM_HEDGE_BUDGET_RATIO of all calls
+LLM_HEDGING_ENABLED = os.getenv("LLM_HEDGING_ENABLED", "false").lower() == "true"
+LLM_HEDGE_PERCENTILE = float(os.getenv("LLM_HEDGE_PERCENTILE", "95"))
+LLM_HEDGE_BUDGET_RATIO = float(os.getenv("LLM_HEDGE_BUDGET_RATIO", "0.05"))
+
+# Shared HTTP connection pool for Gemini calls (sized to LLM_CONCURRENCY)
+LLM_HTTP_CONNECT_TIMEOUT = float(os.getenv("LLM_HTTP_CONNECT_TIMEOUT", "5"))
+LLM_HTTP_READ_TIMEOUT = float(os.getenv("LLM_HTTP_READ_TIMEOUT", "120"))
+LLM_HTTP_KEEPALIVE_EXPIRY = float(os.getenv("LLM_HTTP_KEEPALIVE_EXPIRY", "60"))
+
+# USD per 1M (input, output) tokens, used for the per-model cost counters
+GEMINI_MODEL_PRICING = {
+    "gemini-2.5-flash-lite": (0.10, 0.40),
+    "gemini-2.5-flash": (0.30, 2.50),
+    "gemini-2.5-pro": (1.25, 10.00),
+}
+
 class Settings:
     """Application settings."""
     upload_folder: Path = UPLOAD_FOLDER
     allowed_extensions: set = ALLOWED_EXTENSIONS
     max_file_size: int = MAX_FILE_SIZE
+    results_db_path: Path = RESULTS_DB_PATH
+    admin_token: str = ADMIN_TOKEN
+    profile_folder: Path = PROFILE_FOLDER
+    span_export_path: Path = SPAN_EXPORT_PATH
+    request_deadline_seconds: float = REQUEST_DEADLINE_SECONDS
+    max_request_deadline_seconds: float = MAX_REQUEST_DEADLINE_SECONDS
     api_title: str = "Order Form Extraction API"
     api_version: str = "1.0.0"
     cors_origins: list = ["*"]  # In production, specify actual origins
@@ -33,5 +111,29 @@ class Settings:
     java_api_url: str = JAVA_API_URL
     java_api_key: str = JAVA_API_KEY
 
+    # Scheduling settings
+    extraction_worker_slots: int = EXTRACTION_WORKER_SLOTS
+    llm_concurrency: int = LLM_CONCURRENCY
+    lane_weights: dict = LANE_WEIGHTS
+    caller_quotas: dict = CALLER_QUOTAS
+    caller_api_keys: dict = CALLER_API_KEYS
+    trusted_proxies: set = TRUSTED_PROXIES
+
+    # Gemini extraction settings
+    gemini_model: str = GEMINI_MODEL
+    chunk_cache_max_entries: int = CHUNK_CACHE_MAX_ENTRIES
+    input_compaction_enabled: bool = INPUT_COMPACTION_ENABLED
+    table_parser_enabled: bool = TABLE_PARSER_ENABLED
+    chunk_size: int = CHUNK_SIZE
+    llm_cascade_enabled: bool = LLM_CASCADE_ENABLED
+    gemini_fallback_model: str = GEMINI_FALLBACK_MODEL
+    gemini_model_pricing: dict = GEMINI_MODEL_PRICING
+    llm_http_connect_timeout: float = LLM_HTTP_CONNECT_TIMEOUT
+    llm_http_read_timeout: float = LLM_HTTP_READ_TIMEOUT
+    llm_http_keepalive_expiry: float = LLM_HTTP_KEEPALIVE_EXPIRY
+    llm_hedging_enabled: bool = LLM_HEDGING_ENABLED
+    llm_hedge_percentile: float = LLM_HEDGE_PERCENTILE
+    llm_hedge_budget_ratio: float = LLM_HEDGE_BUDGET_RATIO
+
 settings = Settings()
 
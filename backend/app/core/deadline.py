@@ -0,0 +1,65 @@
+"""
+Per-request deadline and cancellation signal for the extraction pipeline.
+"""
+import threading
+import time
+from typing import Optional
+
+
+class ExtractionCancelled(Exception):
+    """Raised when extraction is stopped because its deadline passed or the client went away."""
+
+    def __init__(self, reason: str):
+        super().__init__(reason)
+        self.reason = reason
+
+
+class Deadline:
+    """
+    Deadline that can also be cancelled explicitly, e.g. on client disconnect.
+    Safe to share between the event loop and the worker thread.
+    """
+
+    DEADLINE_EXCEEDED = "deadline_exceeded"
+    CLIENT_DISCONNECTED = "client_disconnected"
+    QUEUE_TIMEOUT = "queue_timeout"
+
+    def __init__(self, timeout_s: Optional[float] = None, started: bool = True):
+        self.timeout_s = timeout_s
+        self.expires_at = None
+        self._cancelled = threading.Event()
+        self._reason: Optional[str] = None
+        if started:
+            self.start()
+
+    def start(self) -> None:
+        """
+        Start the countdown if it is not already running. A deadline created
+        with started=False has no time limit until then, but can be cancelled.
+        """
+        if self.expires_at is None and self.timeout_s:
+            self.expires_at = time.monotonic() + self.timeout_s
+
+    def cancel(self, reason: str = CLIENT_DISCONNECTED) -> None:
+        """Cancel the work bound to this deadline."""
+        self._reason = reason
+        self._cancelled.set()
+
+    def remaining(self) -> Optional[float]:
+        """Seconds left before the deadline, or None when there is no time limit."""
+        if self.expires_at is None:
+            return None
+        return max(0.0, self.expires_at - time.monotonic())
+
+    def expired(self) -> bool:
+        """Whether the work should stop, either by timeout or explicit cancellation."""
+        return self._cancelled.is_set() or self.remaining() == 0.0
+
+    def check(self) -> None:
+        """
+        Raise ExtractionCancelled if the deadline passed or the work was cancelled.
+        """
+        if self._cancelled.is_set():
+            raise ExtractionCancelled(self._reason)
+        if self.remaining() == 0.0:
+            raise ExtractionCancelled(self.DEADLINE_EXCEEDED)
@@ -0,0 +1,230 @@
+"""
+Weighted fair scheduler with priority lanes and per-caller quotas.
+
+Interactive uploads and bulk/API traffic share the same extraction worker
+slots and Gemini concurrency. Each lane gets slots in proportion to its
+weight while it has work queued (stride scheduling), and a single caller
+can hold at most its lane's quota of slots at once.
+
+The scheduler is usable from both the event loop (slot_async) and worker
+threads (slot), so the same class gates request admission and LLM calls.
+"""
+import asyncio
+import contextvars
+import threading
+import time
+from collections import deque
+from contextlib import asynccontextmanager, contextmanager
+from typing import AsyncIterator, Callable, Deque, Dict, Iterator, Optional
+
+from app.core.config import settings
+from app.core.deadline import Deadline, ExtractionCancelled
+
+INTERACTIVE = "interactive"
+BULK = "bulk"
+
+# Lane and caller of the work running in this context, used by the LLM gate
+current_lane: contextvars.ContextVar[str] = contextvars.ContextVar("current_lane", default=INTERACTIVE)
+current_caller: contextvars.ContextVar[str] = contextvars.ContextVar("current_caller", default="anonymous")
+
+
+class _Waiter:
+    __slots__ = ("caller", "grant", "enqueued_at", "granted")
+
+    def __init__(self, caller: str, grant: Callable[[], None]):
+        self.caller = caller
+        self.grant = grant
+        self.enqueued_at = time.perf_counter()
+        self.granted = False
+
+
+class FairScheduler:
+    """Hands out a fixed number of slots across weighted lanes."""
+
+    def __init__(
+        self,
+        capacity: int,
+        weights: Dict[str, float],
+        caller_quotas: Optional[Dict[str, int]] = None,
+        wait_window: int = 500,
+    ):
+        self.capacity = capacity
+        self.weights = weights
+        self.caller_quotas = caller_quotas or {}
+        self._lock = threading.Lock()
+        self._in_use = 0
+        self._queues: Dict[str, Deque[_Waiter]] = {lane: deque() for lane in weights}
+        self._pass: Dict[str, float] = {lane: 0.0 for lane in weights}
+        self._virtual_time = 0.0
+        self._active_by_caller: Dict[tuple, int] = {}
+        self._stats = {
+            lane: {"granted": 0, "active": 0, "total_wait_s": 0.0, "max_wait_s": 0.0}
+            for lane in weights
+        }
+        self._recent_waits: Dict[str, Deque[float]] = {lane: deque(maxlen=wait_window) for lane in weights}
+
+    # ---------- queueing ----------
+
+    def _enqueue(self, lane: str, caller: str, grant: Callable[[], None]) -> _Waiter:
+        if lane not in self._queues:
+            raise ValueError(f"Unknown scheduler lane: {lane}")
+        waiter = _Waiter(caller, grant)
+        with self._lock:
+            queue = self._queues[lane]
+            if not queue:
+                # A lane returning from idle must not cash in the turns it skipped
+                self._pass[lane] = max(self._pass[lane], self._virtual_time)
+            queue.append(waiter)
+            self._dispatch()
+        return waiter
+
+    def _eligible(self, lane: str) -> Optional[_Waiter]:
+        quota = self.caller_quotas.get(lane)
+        for waiter in self._queues[lane]:
+            if quota is None or self._active_by_caller.get((lane, waiter.caller), 0) < quota:
+                return waiter
+        return None
+
+    def _dispatch(self) -> None:
+        """Grant free slots to the eligible waiter in the lane with the lowest pass. Lock held."""
+        while self._in_use < self.capacity:
+            candidates = {}
+            for lane in self._queues:
+                waiter = self._eligible(lane)
+                if waiter is not None:
+                    candidates[lane] = waiter
+            if not candidates:
+                return
+
+            lane = min(candidates, key=lambda name: self._pass[name])
+            waiter = candidates[lane]
+            self._queues[lane].remove(waiter)
+            self._virtual_time = self._pass[lane]
+            self._pass[lane] += 1.0 / self.weights[lane]
+
+            self._in_use += 1
+            key = (lane, waiter.caller)
+            self._active_by_caller[key] = self._active_by_caller.get(key, 0) + 1
+
+            wait_s = time.perf_counter() - waiter.enqueued_at
+            stats = self._stats[lane]
+            stats["granted"] += 1
+            stats["active"] += 1
+            stats["total_wait_s"] += wait_s
+            stats["max_wait_s"] = max(stats["max_wait_s"], wait_s)
+            self._recent_waits[lane].append(wait_s)
+
+            waiter.granted = True
+            waiter.grant()
+
+    def _release(self, lane: str, caller: str) -> None:
+        with self._lock:
+            self._in_use -= 1
+            self._stats[lane]["active"] -= 1
+            key = (lane, caller)
+            self._active_by_caller[key] -= 1
+            if not self._active_by_caller[key]:
+                del self._active_by_caller[key]
+            self._dispatch()
+
+    def _abandon(self, lane: str, waiter: _Waiter) -> bool:
+        """Drop a waiter that gave up. Returns True if it had already been granted a slot."""
+        with self._lock:
+            if waiter.granted:
+                return True
+            self._queues[lane].remove(waiter)
+            return False
+
+    # ---------- acquisition ----------
+
+    @contextmanager
+    def slot(self, lane: str, caller: str, timeout_s: Optional[float] = None) -> Iterator[None]:
+        """
+        Hold a slot for the block, blocking the calling thread until one is free.
+        Raises TimeoutError if none is granted within timeout_s.
+        """
+        granted = threading.Event()
+        waiter = self._enqueue(lane, caller, granted.set)
+        if not granted.wait(timeout_s) and not self._abandon(lane, waiter):
+            raise TimeoutError(f"No {lane} slot available within {timeout_s}s")
+        try:
+            yield
+        finally:
+            self._release(lane, caller)
+
+    @asynccontextmanager
+    async def slot_async(
+        self,
+        lane: str,
+        caller: str,
+        deadline: Optional[Deadline] = None,
+        poll_interval: float = 0.25,
+    ) -> AsyncIterator[None]:
+        """
+        Hold a slot for the block, waiting on the event loop until one is free.
+        Gives up its place in the queue with ExtractionCancelled once the
+        deadline is cancelled (e.g. client disconnect), or with reason
+        QUEUE_TIMEOUT if it expires before a slot is granted.
+        """
+        loop = asyncio.get_running_loop()
+        granted = loop.create_future()
+
+        def grant() -> None:
+            loop.call_soon_threadsafe(lambda: granted.done() or granted.set_result(None))
+
+        waiter = self._enqueue(lane, caller, grant)
+        try:
+            while not granted.done():
+                if deadline is not None and deadline.expired():
+                    try:
+                        deadline.check()
+                    except ExtractionCancelled as e:
+                        if e.reason == Deadline.DEADLINE_EXCEEDED:
+                            raise ExtractionCancelled(Deadline.QUEUE_TIMEOUT)
+                        raise
+                timeout = poll_interval if deadline is not None else None
+                try:
+                    await asyncio.wait_for(asyncio.shield(granted), timeout)
+                except asyncio.TimeoutError:
+                    pass
+        except BaseException:
+            if self._abandon(lane, waiter):
+                self._release(lane, caller)
+            raise
+        try:
+            yield
+        finally:
+            self._release(lane, caller)
+
+    # ---------- metrics ----------
+
+    def snapshot(self) -> Dict:
+        """
+        Per-lane queue depth, active slots and queue wait time.
+        """
+        with self._lock:
+            lanes = {}
+            for lane, stats in self._stats.items():
+                recent = sorted(self._recent_waits[lane])
+                lanes[lane] = {
+                    "weight": self.weights[lane],
+                    "caller_quota": self.caller_quotas.get(lane),
+                    "queued": len(self._queues[lane]),
+                    "active": stats["active"],
+                    "granted": stats["granted"],
+                    "avg_wait_s": round(stats["total_wait_s"] / stats["granted"], 4) if stats["granted"] else 0.0,
+                    "p95_wait_s": round(recent[min(len(recent) - 1, int(len(recent) * 0.95))], 4) if recent else 0.0,
+                    "max_wait_s": round(stats["max_wait_s"], 4),
+                }
+            return {"capacity": self.capacity, "in_use": self._in_use, "lanes": lanes}
+
+
+# Admission of extraction requests; per-caller quotas apply here
+extraction_scheduler = FairScheduler(
+    settings.extraction_worker_slots,
+    settings.lane_weights,
+    settings.caller_quotas,
+)
+
+# Concurrent Gemini calls, shared by lane weight
+llm_scheduler = FairScheduler(settings.llm_concurrency, settings.lane_weights)
@@ -0,0 +1,231 @@
+"""
+Lightweight span tracing and sampling profiler for on-demand request profiling.
+
+Tracing is off unless a trace has been started in the current context, in
+which case span() is a no-op context manager. Spans follow contextvars,
+so work handed to run_in_threadpool nests under the span that started it.
+"""
+import contextvars
+import json
+import sys
+import threading
+import time
+import uuid
+from collections import Counter
+from contextlib import contextmanager
+from pathlib import Path
+from typing import Any, Dict, Iterator, List, Optional
+
+
+class Span:
+    """A timed, named unit of work with attributes and child spans."""
+
+    def __init__(self, trace: "Trace", name: str, parent: Optional["Span"] = None, **attributes: Any):
+        self.trace = trace
+        self.span_id = uuid.uuid4().hex[:16]
+        self.name = name
+        self.parent = parent
+        self.attributes: Dict[str, Any] = attributes
+        self.children: List["Span"] = []
+        self.thread_id = threading.get_ident()
+        self.start = time.perf_counter()
+        self.end: Optional[float] = None
+
+    @property
+    def duration_ms(self) -> Optional[float]:
+        if self.end is None:
+            return None
+        return round((self.end - self.start) * 1000, 3)
+
+    def set_attribute(self, key: str, value: Any) -> None:
+        self.attributes[key] = value
+
+    def to_dict(self) -> Dict[str, Any]:
+        return {
+            "span_id": self.span_id,
+            "name": self.name,
+            "start_ms": round((self.start - self.trace.root.start) * 1000, 3),
+            "duration_ms": self.duration_ms,
+            "thread_id": self.thread_id,
+            "attributes": self.attributes,
+            "children": [child.to_dict() for child in self.children],
+        }
+
+
+class Trace:
+    """Span tree for a single profiled request."""
+
+    def __init__(self, name: str, **attributes: Any):
+        self.trace_id = uuid.uuid4().hex
+        self._lock = threading.Lock()
+        self._open_spans: Counter = Counter()
+        self.root = Span(self, name, **attributes)
+
+    def add_child(self, parent: Span, child: Span) -> None:
+        with self._lock:
+            parent.children.append(child)
+            self._open_spans[child.thread_id] += 1
+
+    def end_child(self, child: Span) -> None:
+        child.end = time.perf_counter()
+        with self._lock:
+            self._open_spans[child.thread_id] -= 1
+            if self._open_spans[child.thread_id] <= 0:
+                del self._open_spans[child.thread_id]
+
+    def worker_thread_ids(self) -> List[int]:
+        """
+        Threads currently inside an open span of this trace, other than the
+        root span's thread (the event loop, which is shared with unrelated
+        requests). Pool threads drop out as soon as their span ends, so work
+        they pick up for other requests afterwards is not sampled.
+        """
+        with self._lock:
+            return [thread_id for thread_id in self._open_spans if thread_id != self.root.thread_id]
+
+    def iter_spans(self) -> Iterator[Span]:
+        stack = [self.root]
+        while stack:
+            current = stack.pop()
+            yield current
+            stack.extend(reversed(current.children))
+
+    def to_dict(self) -> Dict[str, Any]:
+        return {"trace_id": self.trace_id, "root": self.root.to_dict()}
+
+
+_current_span: contextvars.ContextVar[Optional[Span]] = contextvars.ContextVar("current_span", default=None)
+
+
+def current_span() -> Optional[Span]:
+    """The innermost open span in this context, or None when not tracing."""
+    return _current_span.get()
+
+
+@contextmanager
+def start_trace(name: str, **attributes: Any) -> Iterator[Trace]:
+    """
+    Start a new trace and make its root span current for the duration of the block.
+    """
+    trace = Trace(name, **attributes)
+    token = _current_span.set(trace.root)
+    try:
+        yield trace
+    finally:
+        trace.root.end = time.perf_counter()
+        _current_span.reset(token)
+
+
+@contextmanager
+def span(name: str, **attributes: Any) -> Iterator[Optional[Span]]:
+    """
+    Record a child span of the current span. Does nothing when no trace is active.
+    """
+    parent = _current_span.get()
+    if parent is None:
+        yield None
+        return
+
+    child = Span(parent.trace, name, parent, **attributes)
+    parent.trace.add_child(parent, child)
+    token = _current_span.set(child)
+    try:
+        yield child
+    except BaseException as e:
+        child.set_attribute("error", type(e).__name__)
+        raise
+    finally:
+        parent.trace.end_child(child)
+        _current_span.reset(token)
+
+
+class SamplingProfiler:
+    """
+    Samples the stacks of the worker threads taking part in a trace at a
+    fixed interval and aggregates them as folded stacks ("a;b;c count").
+    A thread is only sampled while it has an open span of the trace; the
+    event-loop thread is never sampled, since its stacks would mix in
+    frames from other concurrent requests.
+    """
+
+    SCOPE = (
+        "worker threads only, while they have an open span of this trace; "
+        "the event-loop thread running the root span is not sampled"
+    )
+
+    def __init__(self, trace: Trace, interval_s: float = 0.005):
+        self.trace = trace
+        self.interval_s = interval_s
+        self.samples: Counter = Counter()
+        self._stop = threading.Event()
+        self._thread = threading.Thread(target=self._run, name="sampling-profiler", daemon=True)
+
+    def __enter__(self) -> "SamplingProfiler":
+        self._thread.start()
+        return self
+
+    def __exit__(self, *exc_info) -> None:
+        self._stop.set()
+        self._thread.join()
+
+    def _run(self) -> None:
+        own_id = threading.get_ident()
+        while not self._stop.wait(self.interval_s):
+            frames = sys._current_frames()
+            for thread_id in self.trace.worker_thread_ids():
+                frame = frames.get(thread_id)
+                if frame is None or thread_id == own_id:
+                    continue
+                stack = []
+                while frame is not None:
+                    code = frame.f_code
+                    stack.append(f"{Path(code.co_filename).name}:{code.co_name}:{frame.f_lineno}")
+                    frame = frame.f_back
+                self.samples[";".join(reversed(stack))] += 1
+
+    def folded(self) -> List[str]:
+        """Samples as folded-stack lines, heaviest first (flamegraph.pl / speedscope input)."""
+        return [f"{stack} {count}" for stack, count in self.samples.most_common()]
+
+
+class SpanFileExporter:
+    """Appends finished traces to a local JSON Lines file, one line per span."""
+
+    def __init__(self, path: Path):
+        self.path = Path(path)
+        self._lock = threading.Lock()
+
+    def export(self, trace: Trace) -> None:
+        lines = []
+        for item in trace.iter_spans():
+            lines.append(json.dumps({
+                "trace_id": trace.trace_id,
+                "span_id": item.span_id,
+                "parent_id": item.parent.span_id if item.parent else None,
+                "name": item.name,
+                "start_ms": round((item.start - trace.root.start) * 1000, 3),
+                "duration_ms": item.duration_ms,
+                "thread_id": item.thread_id,
+                "attributes": item.attributes,
+            }, default=str))
+        with self._lock:
+            self.path.parent.mkdir(parents=True, exist_ok=True)
+            with open(self.path, "a", encoding="utf-8") as f:
+                f.write("\n".join(lines) + "\n")
+
+
+def write_profile(trace: Trace, profiler: Optional[SamplingProfiler], folder: Path) -> Path:
+    """
+    Store a trace's span tree and sampled stacks as <trace_id>.json in folder.
+    """
+    folder = Path(folder)
+    folder.mkdir(parents=True, exist_ok=True)
+    path = folder / f"{trace.trace_id}.json"
+    payload = trace.to_dict()
+    if profiler is not None:
+        payload["sampling_interval_s"] = profiler.interval_s
+        payload["sampling_scope"] = profiler.SCOPE
+        payload["folded_stacks"] = profiler.folded()
+    with open(path, "w", encoding="utf-8") as f:
+        json.dump(payload, f, default=str)
+    return path
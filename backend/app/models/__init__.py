@@ -8,7 +8,11 @@ from .schemas import (
     ClientModule,
     Client,
     ExtractionResponse,
-    FinalSubmissionResponse
+    FinalSubmissionResponse,
+    StoredExtraction,
+    StoredSubmission,
+    ExtractionPage,
+    SubmissionPage
 )
 
 __all__ = [
@@ -21,6 +25,10 @@ __all__ = [
     "ClientModule",
     "Client",
     "ExtractionResponse",
-    "FinalSubmissionResponse"
+    "FinalSubmissionResponse",
+    "StoredExtraction",
+    "StoredSubmission",
+    "ExtractionPage",
+    "SubmissionPage"
 ]
 
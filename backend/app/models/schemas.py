@@ -1,8 +1,8 @@
 """Pydantic models for order form data validation."""
 
-from typing import List, Optional, Union, Literal
+from typing import Dict, List, Optional, Union, Literal
 from pydantic import BaseModel, EmailStr, Field, field_validator
-from datetime import date
+from datetime import date, datetime
 from pydantic import ConfigDict
 
 
@@ -116,6 +116,10 @@ class ExtractionResponse(BaseModel):
     data: Optional[OrderFormData] = None
     message: Optional[str] = None
     raw_text: Optional[str] = None
+    extraction_id: Optional[str] = None
+    section_tiers: Optional[Dict[str, List[str]]] = Field(
+        None, description="Models that produced each extracted section"
+    )
 
 
 class FinalSubmissionResponse(BaseModel):
@@ -124,3 +128,34 @@ class FinalSubmissionResponse(BaseModel):
     message: str
     submitted_data: OrderFormData
     submission_status: Optional[Literal["success", "retry", "info"]] = None
+
+
+class StoredExtraction(BaseModel):
+    """Extraction result as persisted in the local results store."""
+    extraction_id: str
+    created_at: datetime
+    source_filename: Optional[str] = None
+    response: ExtractionResponse
+
+
+class StoredSubmission(BaseModel):
+    """Final submission as persisted in the local results store."""
+    submission_id: str
+    submitted_at: datetime
+    response: FinalSubmissionResponse
+
+
+class ExtractionPage(BaseModel):
+    """Paginated list of stored extractions."""
+    items: List[StoredExtraction] = Field(default_factory=list)
+    page: int
+    page_size: int
+    total: int
+
+
+class SubmissionPage(BaseModel):
+    """Paginated list of stored submissions."""
+    items: List[StoredSubmission] = Field(default_factory=list)
+    page: int
+    page_size: int
+    total: int
@@ -0,0 +1,93 @@
+"""
+In-memory LRU cache for per-chunk Gemini extraction results.
+
+Revised order forms usually differ from the previous upload by a single
+page, so results are cached per normalized chunk rather than per file.
+"""
+import copy
+import hashlib
+import re
+import threading
+from collections import OrderedDict
+from typing import Dict, Optional
+
+
+def normalize_chunk(chunk: str) -> str:
+    """
+    Normalize chunk text so that whitespace-only differences hit the same entry.
+    """
+    return re.sub(r"\s+", " ", chunk).strip()
+
+
+def make_chunk_key(chunk: str, model: str, prompt_version: str) -> str:
+    """
+    Build the cache key for a chunk from its normalized text, model and prompt version.
+    """
+    digest = hashlib.sha256()
+    digest.update(model.encode("utf-8"))
+    digest.update(b"\x00")
+    digest.update(prompt_version.encode("utf-8"))
+    digest.update(b"\x00")
+    digest.update(normalize_chunk(chunk).encode("utf-8"))
+    return digest.hexdigest()
+
+
+class ChunkResultCache:
+    """Thread-safe, bounded LRU cache of parsed chunk results."""
+
+    def __init__(self, max_entries: int = 512):
+        self.max_entries = max_entries
+        self._entries: "OrderedDict[str, Dict]" = OrderedDict()
+        self._lock = threading.Lock()
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+
+    def get(self, key: str) -> Optional[Dict]:
+        """
+        Return a copy of the cached result for key, or None on a miss.
+        """
+        with self._lock:
+            result = self._entries.get(key)
+            if result is None:
+                self.misses += 1
+                return None
+            self._entries.move_to_end(key)
+            self.hits += 1
+            return copy.deepcopy(result)
+
+    def put(self, key: str, result: Dict) -> None:
+        """
+        Store a result, evicting the least recently used entries past max_entries.
+        """
+        if self.max_entries <= 0:
+            return
+        with self._lock:
+            self._entries[key] = copy.deepcopy(result)
+            self._entries.move_to_end(key)
+            while len(self._entries) > self.max_entries:
+                self._entries.popitem(last=False)
+                self.evictions += 1
+
+    def clear(self) -> None:
+        """Drop all entries and reset counters."""
+        with self._lock:
+            self._entries.clear()
+            self.hits = 0
+            self.misses = 0
+            self.evictions = 0
+
+    def stats(self) -> Dict:
+        """
+        Return size and hit-ratio counters for reporting.
+        """
+        with self._lock:
+            lookups = self.hits + self.misses
+            return {
+                "size": len(self._entries),
+                "max_entries": self.max_entries,
+                "hits": self.hits,
+                "misses": self.misses,
+                "evictions": self.evictions,
+                "hit_ratio": round(self.hits / lookups, 4) if lookups else 0.0,
+            }
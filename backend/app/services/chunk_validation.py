@@ -0,0 +1,120 @@
+"""
+Schema and sanity checks for a single chunk's Gemini output.
+
+Used by the model cascade to decide whether a chunk needs to be
+re-extracted on the stronger model.
+"""
+import re
+from typing import AbstractSet, Any, Dict, List, Type
+
+from pydantic import BaseModel, ValidationError
+
+from app.models.schemas import (
+    BankAccount,
+    BillingTerms,
+    Client,
+    ClientModule,
+    ClientSelectedPlan,
+    Contact,
+    PlanCatalog,
+)
+
+
+SINGLE_SECTIONS = {
+    "client": Client,
+    "bank_account": BankAccount,
+    "billing_terms": BillingTerms,
+    "client_selected_plan": ClientSelectedPlan,
+}
+
+LIST_SECTIONS = {
+    "contacts": Contact,
+    "plan_catalog": PlanCatalog,
+    "add_on_modules": ClientModule,
+}
+
+PLAN_RANGES = {
+    "01-50": (1, 50),
+    "51-100": (51, 100),
+    "100+": (101, 10000),
+}
+
+DATE_PATTERN = re.compile(r"^\d{4}-\d{2}-\d{2}$")
+
+
+def _digits(value: Any) -> str:
+    return re.sub(r"\D", "", str(value))
+
+
+def _check_model(section: str, model: Type[BaseModel], value: Any, problems: List[str]) -> None:
+    if not isinstance(value, dict):
+        problems.append(f"{section}: expected an object")
+        return
+    try:
+        model(**value)
+    except ValidationError as e:
+        problems.append(f"{section}: {e.error_count()} schema error(s)")
+
+
+def validate_chunk_result(result: Dict[str, Any], skip_sections: AbstractSet[str] = frozenset()) -> List[str]:
+    """
+    Check a chunk result against the OrderFormData section schemas and
+    field-level sanity rules. Sections in skip_sections are not checked,
+    e.g. those parsed deterministically whose LLM output is discarded.
+
+    Returns:
+        List[str]: Human readable problems; empty when the chunk looks sound.
+    """
+    if not isinstance(result, dict):
+        return ["result is not a JSON object"]
+    if "raw_text" in result:
+        return ["response was not valid JSON"]
+
+    problems: List[str] = []
+
+    for section, model in SINGLE_SECTIONS.items():
+        value = result.get(section)
+        if value is not None and section not in skip_sections:
+            _check_model(section, model, value, problems)
+
+    for section, model in LIST_SECTIONS.items():
+        value = result.get(section)
+        if value is None or section in skip_sections:
+            continue
+        if not isinstance(value, list):
+            problems.append(f"{section}: expected a list")
+            continue
+        for index, item in enumerate(value):
+            _check_model(f"{section}[{index}]", model, item, problems)
+
+    client = result.get("client")
+    if isinstance(client, dict) and client.get("dsp_fein"):
+        if len(_digits(client["dsp_fein"])) != 9:
+            problems.append("client.dsp_fein: expected 9 digits")
+
+    bank = result.get("bank_account")
+    if isinstance(bank, dict) and bank.get("routing_number"):
+        if len(_digits(bank["routing_number"])) != 9:
+            problems.append("bank_account.routing_number: expected 9 digits")
+
+    billing = result.get("billing_terms")
+    if isinstance(billing, dict):
+        for field in ("initial_term_start_date", "initial_term_end_date"):
+            value = billing.get(field)
+            if value and not DATE_PATTERN.match(str(value)):
+                problems.append(f"billing_terms.{field}: expected YYYY-MM-DD")
+
+    plans = result.get("plan_catalog")
+    if isinstance(plans, list) and "plan_catalog" not in skip_sections:
+        for index, plan in enumerate(plans):
+            if not isinstance(plan, dict):
+                continue
+            expected = PLAN_RANGES.get(plan.get("employee_range_label"))
+            if expected is None:
+                problems.append(f"plan_catalog[{index}].employee_range_label: unknown bracket")
+                continue
+            actual = (plan.get("employee_range_min"), plan.get("employee_range_max"))
+            if actual != expected:
+                problems.append(f"plan_catalog[{index}]: range {actual} does not match {expected}")
+
+    return problems
@@ -3,90 +3,66 @@ Gemini AI service for structured data extraction.
 Based on gemini_client.py logic.
 """
 from google import genai
+import asyncio
 import os
 from dotenv import load_dotenv
 import json
 import re
-from typing import List, Dict, Optional
+import time
+from contextlib import nullcontext
+from typing import AbstractSet, List, Dict, Optional
 from google.genai import types
+from app.core.config import settings
+from app.core.deadline import Deadline, ExtractionCancelled
+from app.core.scheduler import current_caller, current_lane, llm_scheduler
+from app.core.tracing import span
+from app.services.chunk_cache import ChunkResultCache, make_chunk_key
+from app.services.chunk_validation import validate_chunk_result
+from app.services.hedging import HedgeBudget, Hedger, LatencyTracker
+from app.services.llm_http import (
+    ConnectionStats,
+    build_llm_async_http_client,
+    build_llm_async_http_transport,
+    build_llm_http_client,
+)
+from app.services.llm_metrics import llm_metrics
 
 load_dotenv()
-client = genai.Client()
-
-def clean_gemini_response(raw_text: str) -> str:
-    """
-    Remove ```json code fences and extra whitespace from Gemini API response.
-    """
-    cleaned = re.sub(r"^```json\s*|\s*```$", "", raw_text.strip(), flags=re.MULTILINE)
-    return cleaned.strip()
-
-
-def split_text_into_chunks(text: str, chunk_size: int = 5000) -> List[str]:
-    """
-    Split long text into smaller chunks to fit into LLM input limits.
-    """
-    chunks = []
-    start = 0
-    while start < len(text):
-        chunks.append(text[start:start+chunk_size])
-        start += chunk_size
-    return chunks
-
-
-def merge_chunked_results(results: List[Dict]) -> Dict:
-    """
-    Merge JSON outputs from multiple chunks.
-    Concatenate lists and keep first dict values for single-object tables.
-    """
-    final_result = {
-        "client": None,
-        "contacts": [],
-        "bank_account": None,
-        "billing_terms": None,
-        "plan_catalog": [],
-        "client_selected_plan": None,
-        "add_on_modules": [],
-        "additional_notes": None
-    }
-
-    for res in results:
-        if final_result["client"] is None and res.get("client"):
-            final_result["client"] = res["client"]
-
-        if res.get("contacts"):
-            final_result["contacts"].extend(res["contacts"])
-
-        if final_result["bank_account"] is None and res.get("bank_account"):
-            final_result["bank_account"] = res["bank_account"]
-
-        if final_result["billing_terms"] is None and res.get("billing_terms"):
-            final_result["billing_terms"] = res["billing_terms"]
-
-        if res.get("plan_catalog"):
-            final_result["plan_catalog"].extend(res["plan_catalog"])
-        
-        if final_result["client_selected_plan"] is None and res.get("client_selected_plan"):
-            final_result["client_selected_plan"] = res["client_selected_plan"]
-
-        if res.get("add_on_modules"):
-            final_result["add_on_modules"].extend(res["add_on_modules"])
-        
-        if final_result["additional_notes"] is None and res.get("additional_notes"):
-            final_result["additional_notes"] = res["additional_notes"]
-
-    return final_result
-
-
-def get_structured_response_chunked(text: str, chunk_size: int = 5000) -> Optional[dict]:
+http_stats = ConnectionStats()
+http_client = build_llm_http_client(http_stats)
+# Hedged calls go through client.aio so the losing call can be cancelled
+async_http_transport = build_llm_async_http_transport()
+async_http_client = build_llm_async_http_client(http_stats, async_http_transport)
+client = genai.Client(http_options=types.HttpOptions(
+    httpx_client=http_client,
+    httpx_async_client=async_http_client,
+    # An explicit transport keeps the SDK on httpx even when aiohttp is installed
+    async_client_args={"transport": async_http_transport},
+))
+
+# Bump whenever EXTRACTION_PROMPT_TEMPLATE changes so cached chunk results are invalidated.
+PROMPT_VERSION = "1"
+
+chunk_cache = ChunkResultCache(max_entries=settings.chunk_cache_max_entries)
+
+# Hedging: duplicate a call that runs past the tracked latency percentile
+latency_tracker = LatencyTracker()
+hedge_budget = HedgeBudget(ratio=settings.llm_hedge_budget_ratio)
+hedger = Hedger()
+
+# Optional semaphore bounding concurrent generate_content calls, e.g. one
+# shared across worker processes by the bulk backfill CLI.
+_llm_slots = None
+
+
+def set_llm_concurrency_limiter(semaphore) -> None:
     """
-    Extract structured JSON from long PDF text using Gemini API with chunking.
+    Bound concurrent Gemini calls with a semaphore-like object (or None to remove the cap).
     """
-    try:
-        chunks = split_text_into_chunks(text, chunk_size)
-        all_results = []
+    global _llm_slots
+    _llm_slots = semaphore
 
-        for i, chunk in enumerate(chunks, 1):
-            prompt = f"""
+EXTRACTION_PROMPT_TEMPLATE = """
 You are an AI that reads extracted text and tables fed to you. 
 Understand the context of the text and tables.
 Validate any missing information from both text and tables and fill.  
@@ -163,27 +139,292 @@ Extract all relevant information and return a **single JSON object** with the fo
 - There should be only two contacts in the contacts list - one DSP contact and one Accounts Payable contact. Please don't inlcude any additional contacts.
 - Inside the plan_catalog add all the available plan details as listed
 - Keep additional notes in the additional_notes field otherwise keep it empty
-- Return only JSON, no explanations or extra text.
+- Return only JSON, no explanations or extra text.{skip_instructions}
 
 
 PDF text:
 {chunk}
 """
+
+
+def build_extraction_prompt(chunk: str, skip_sections: AbstractSet[str] = frozenset()) -> str:
+    """
+    Build the Gemini extraction prompt for a single chunk of PDF text.
+    Sections in skip_sections are already parsed from the PDF tables, so the
+    model is told to leave them empty.
+    """
+    skip_instructions = ""
+    if skip_sections:
+        skip_instructions = (
+            f"\n- Return {', '.join(sorted(skip_sections))} as empty lists; "
+            f"they are extracted separately from the PDF tables."
+        )
+    return EXTRACTION_PROMPT_TEMPLATE.format(chunk=chunk, skip_instructions=skip_instructions)
+
+def clean_gemini_response(raw_text: str) -> str:
+    """
+    Remove ```json code fences and extra whitespace from Gemini API response.
+    """
+    cleaned = re.sub(r"^```json\s*|\s*```$", "", raw_text.strip(), flags=re.MULTILINE)
+    return cleaned.strip()
+
+
+def split_text_into_chunks(text: str, chunk_size: int = 5000) -> List[str]:
+    """
+    Split long text into smaller chunks to fit into LLM input limits.
+    Each page marker starts a new chunk and only pages longer than chunk_size
+    are split further, so chunk boundaries never depend on the length of
+    other pages: an edit to one page leaves the other chunks (and their
+    cached results) unchanged.
+    """
+    pages = [page for page in re.split(r"(?=\n=== PAGE \d+ TEXT ===)", text) if page.strip()]
+
+    chunks = []
+    for page in pages:
+        for start in range(0, len(page), chunk_size):
+            chunks.append(page[start:start + chunk_size])
+    return chunks
+
+
+def merge_chunked_results(results: List[Dict], tiers: Optional[List[str]] = None) -> Dict:
+    """
+    Merge JSON outputs from multiple chunks.
+    Concatenate lists and keep first dict values for single-object tables.
+    When tiers (the model that produced each chunk) is given, the merged
+    result records under "section_tiers" which models each section came from.
+    """
+    final_result = {
+        "client": None,
+        "contacts": [],
+        "bank_account": None,
+        "billing_terms": None,
+        "plan_catalog": [],
+        "client_selected_plan": None,
+        "add_on_modules": [],
+        "additional_notes": None
+    }
+    section_tiers: Dict[str, List[str]] = {}
+
+    def mark(section: str, index: int) -> None:
+        if tiers is None:
+            return
+        section_models = section_tiers.setdefault(section, [])
+        if tiers[index] not in section_models:
+            section_models.append(tiers[index])
+
+    for index, res in enumerate(results):
+        if final_result["client"] is None and res.get("client"):
+            final_result["client"] = res["client"]
+            mark("client", index)
+
+        if res.get("contacts"):
+            final_result["contacts"].extend(res["contacts"])
+            mark("contacts", index)
+
+        if final_result["bank_account"] is None and res.get("bank_account"):
+            final_result["bank_account"] = res["bank_account"]
+            mark("bank_account", index)
+
+        if final_result["billing_terms"] is None and res.get("billing_terms"):
+            final_result["billing_terms"] = res["billing_terms"]
+            mark("billing_terms", index)
+
+        if res.get("plan_catalog"):
+            final_result["plan_catalog"].extend(res["plan_catalog"])
+            mark("plan_catalog", index)
+        
+        if final_result["client_selected_plan"] is None and res.get("client_selected_plan"):
+            final_result["client_selected_plan"] = res["client_selected_plan"]
+            mark("client_selected_plan", index)
+
+        if res.get("add_on_modules"):
+            final_result["add_on_modules"].extend(res["add_on_modules"])
+            mark("add_on_modules", index)
+        
+        if final_result["additional_notes"] is None and res.get("additional_notes"):
+            final_result["additional_notes"] = res["additional_notes"]
+            mark("additional_notes", index)
+
+    if tiers is not None:
+        final_result["section_tiers"] = section_tiers
+    return final_result
+
+
+def _call_config(deadline: Optional[Deadline]) -> Optional[types.GenerateContentConfig]:
+    """
+    Bound the HTTP timeout of a single call by the time left on the deadline.
+    """
+    remaining = deadline.remaining() if deadline is not None else None
+    if remaining is None:
+        return None
+    return types.GenerateContentConfig(
+        http_options=types.HttpOptions(timeout=max(1, int(remaining * 1000)))
+    )
+
+
+def _cut_by_deadline(deadline: Optional[Deadline]) -> bool:
+    return deadline is not None and deadline.expired()
+
+
+def _generate_content(model: str, prompt: str, deadline: Optional[Deadline] = None):
+    """
+    Make one generate_content call, respecting the concurrency caps and
+    recording latency, tokens and cost.
+    """
+    slot_timeout = deadline.remaining() if deadline is not None else None
+    with llm_scheduler.slot(current_lane.get(), current_caller.get(), slot_timeout), \
+            _llm_slots if _llm_slots is not None else nullcontext():
+        if deadline is not None:
+            deadline.check()
+        started = time.perf_counter()
+        try:
             response = client.models.generate_content(
-                model="gemini-2.5-flash-lite",
+                model=model,
                 contents=prompt,
+                config=_call_config(deadline),
             )
+        except Exception:
+            # A call cut short by the deadline is counted as a cancellation, not an error
+            llm_metrics.record_call(model, time.perf_counter() - started, error=not _cut_by_deadline(deadline))
+            raise
+        latency = time.perf_counter() - started
+        llm_metrics.record_call(model, latency, response.usage_metadata)
+        latency_tracker.record(model, latency)
+    return response
+
+
+async def _acquire_llm_slot(poll_interval: float = 0.05) -> None:
+    """Take one unit of the optional cross-process limiter without blocking the event loop."""
+    if _llm_slots is None:
+        return
+    while not _llm_slots.acquire(False):
+        await asyncio.sleep(poll_interval)
 
-            cleaned_text = clean_gemini_response(response.text)
 
+async def _generate_content_async(model: str, prompt: str, deadline: Optional[Deadline] = None):
+    """
+    Async counterpart of _generate_content used for hedged calls. Cancelling
+    it aborts the HTTP request and frees its concurrency slots.
+    """
+    async with llm_scheduler.slot_async(current_lane.get(), current_caller.get(), deadline):
+        await _acquire_llm_slot()
+        try:
+            if deadline is not None:
+                deadline.check()
+            started = time.perf_counter()
             try:
-                all_results.append(json.loads(cleaned_text))
-            except json.JSONDecodeError:
-                all_results.append({"raw_text": cleaned_text})
+                response = await client.aio.models.generate_content(
+                    model=model,
+                    contents=prompt,
+                    config=_call_config(deadline),
+                )
+            except Exception:
+                # A call cut short by the deadline is counted as a cancellation, not an error
+                llm_metrics.record_call(model, time.perf_counter() - started, error=not _cut_by_deadline(deadline))
+                raise
+            latency = time.perf_counter() - started
+            llm_metrics.record_call(model, latency, response.usage_metadata)
+            latency_tracker.record(model, latency)
+        finally:
+            if _llm_slots is not None:
+                _llm_slots.release()
+    return response
+
+
+def extract_chunk(
+    chunk: str,
+    model: str,
+    deadline: Optional[Deadline] = None,
+    skip_sections: AbstractSet[str] = frozenset()
+) -> Dict:
+    """
+    Extract structured JSON from a single chunk with the given model,
+    consulting the chunk cache first.
+    Raises ExtractionCancelled if the deadline has passed before the call is made.
+    """
+    with span("llm.chunk", model=model, chars=len(chunk)) as chunk_span:
+        prompt_version = PROMPT_VERSION
+        if skip_sections:
+            prompt_version += ";skip=" + ",".join(sorted(skip_sections))
+        cache_key = make_chunk_key(chunk, model, prompt_version)
+        cached_result = chunk_cache.get(cache_key)
+        if chunk_span is not None:
+            chunk_span.set_attribute("cache_hit", cached_result is not None)
+        if cached_result is not None:
+            return cached_result
+
+        prompt = build_extraction_prompt(chunk, skip_sections)
+        if settings.llm_hedging_enabled:
+            response = hedger.call(
+                lambda: _generate_content_async(model, prompt, deadline),
+                hedge_after_s=latency_tracker.percentile(model, settings.llm_hedge_percentile),
+                budget=hedge_budget,
+                timeout_s=deadline.remaining() if deadline is not None else None,
+                on_hedge=llm_metrics.record_hedge,
+            )
+        else:
+            response = _generate_content(model, prompt, deadline)
+
+        cleaned_text = clean_gemini_response(response.text)
+
+        try:
+            chunk_result = json.loads(cleaned_text)
+        except json.JSONDecodeError:
+            return {"raw_text": cleaned_text}
 
-        final_result = merge_chunked_results(all_results)
+        chunk_cache.put(cache_key, chunk_result)
+        return chunk_result
+
+
+def get_structured_response_chunked(
+    text: str,
+    chunk_size: Optional[int] = None,
+    deadline: Optional[Deadline] = None,
+    raise_on_error: bool = False,
+    skip_sections: AbstractSet[str] = frozenset()
+) -> Optional[dict]:
+    """
+    Extract structured JSON from long PDF text using Gemini API with chunking.
+    Remaining chunks are skipped and ExtractionCancelled raised once the
+    deadline passes or is cancelled. Gemini errors return None unless
+    raise_on_error is set, in which case they propagate to the caller.
+    Sections in skip_sections (parsed deterministically) are neither
+    requested from the model nor checked by the cascade.
+    """
+    try:
+        chunks = split_text_into_chunks(text, chunk_size or settings.chunk_size)
+        all_results = []
+        chunk_tiers = []
+
+        for i, chunk in enumerate(chunks, 1):
+            model = settings.gemini_model
+            chunk_result = extract_chunk(chunk, model, deadline, skip_sections)
+
+            if settings.llm_cascade_enabled:
+                problems = validate_chunk_result(chunk_result, skip_sections)
+                if problems:
+                    print(f"Chunk {i} escalated to {settings.gemini_fallback_model}: {'; '.join(problems)}")
+                    llm_metrics.record_escalation()
+                    fallback_result = extract_chunk(chunk, settings.gemini_fallback_model, deadline, skip_sections)
+                    # The fallback can do worse (e.g. unparseable JSON); keep it only if it has fewer problems
+                    if len(validate_chunk_result(fallback_result, skip_sections)) < len(problems):
+                        model = settings.gemini_fallback_model
+                        chunk_result = fallback_result
+
+            all_results.append(chunk_result)
+            chunk_tiers.append(model)
+
+        with span("llm.merge", chunks=len(all_results)):
+            final_result = merge_chunked_results(all_results, chunk_tiers)
         return final_result
+    except ExtractionCancelled:
+        raise
     except Exception as e:
+        if deadline is not None:
+            # A call cut short by the deadline timeout is a cancellation, not an error
+            deadline.check()
         print(f"Error in Gemini extraction: {str(e)}")
+        if raise_on_error:
+            raise
         return None
 
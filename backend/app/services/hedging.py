@@ -0,0 +1,160 @@
+"""
+Request hedging for Gemini calls.
+
+A call still running past the tracked latency percentile gets a duplicate;
+the first reply wins and the loser is cancelled. A token-bucket budget
+keeps the extra calls to a small fraction of total call volume.
+
+Calls are coroutines run on a private event loop thread, so cancelling the
+losing task aborts its in-flight HTTP request and releases its
+concurrency slot instead of letting it run to completion.
+"""
+import asyncio
+import contextvars
+import threading
+from collections import defaultdict, deque
+from typing import Awaitable, Callable, Deque, Dict, List, Optional, TypeVar
+
+T = TypeVar("T")
+
+
+class LatencyTracker:
+    """Sliding window of recent successful call latencies per model."""
+
+    def __init__(self, window: int = 200, min_samples: int = 20):
+        self.min_samples = min_samples
+        self._lock = threading.Lock()
+        self._samples: Dict[str, Deque[float]] = defaultdict(lambda: deque(maxlen=window))
+
+    def record(self, model: str, latency_s: float) -> None:
+        with self._lock:
+            self._samples[model].append(latency_s)
+
+    def percentile(self, model: str, percentile: float) -> Optional[float]:
+        """
+        Latency at the given percentile, or None until enough samples are collected.
+        """
+        with self._lock:
+            samples = sorted(self._samples[model])
+        if len(samples) < self.min_samples:
+            return None
+        index = min(len(samples) - 1, int(len(samples) * percentile / 100))
+        return samples[index]
+
+
+class HedgeBudget:
+    """
+    Token bucket: every primary call earns `ratio` tokens (up to `burst`),
+    every hedge spends one, so hedges stay within ratio of total calls.
+    """
+
+    def __init__(self, ratio: float = 0.05, burst: float = 5.0):
+        self.ratio = ratio
+        self.burst = burst
+        self._tokens = 0.0
+        self._lock = threading.Lock()
+
+    def record_call(self) -> None:
+        with self._lock:
+            self._tokens = min(self.burst, self._tokens + self.ratio)
+
+    def try_spend(self) -> bool:
+        with self._lock:
+            if self._tokens >= 1.0:
+                self._tokens -= 1.0
+                return True
+            return False
+
+
+async def _first_success(tasks: List[asyncio.Task], deadline_at: Optional[float]) -> asyncio.Task:
+    """
+    Wait for the first task to succeed; if all fail, return the first failure.
+    The timeout shrinks with each wait so the total never exceeds deadline_at.
+    Raises TimeoutError if no task succeeds before deadline_at.
+    """
+    loop = asyncio.get_running_loop()
+    pending = set(tasks)
+    failed = []
+    while pending:
+        timeout = None if deadline_at is None else deadline_at - loop.time()
+        if timeout is not None and timeout <= 0:
+            break
+        done, pending = await asyncio.wait(pending, timeout=timeout, return_when=asyncio.FIRST_COMPLETED)
+        if not done:
+            break
+        for task in tasks:
+            if task in done:
+                if not task.cancelled() and task.exception() is None:
+                    return task
+                failed.append(task)
+    if failed and not pending:
+        return failed[0]
+    raise TimeoutError("Hedged call did not finish before its timeout")
+
+
+class Hedger:
+    """Runs a call with an optional hedge after a latency-percentile delay."""
+
+    def __init__(self):
+        self._loop: Optional[asyncio.AbstractEventLoop] = None
+        self._lock = threading.Lock()
+
+    def _event_loop(self) -> asyncio.AbstractEventLoop:
+        with self._lock:
+            if self._loop is None:
+                self._loop = asyncio.new_event_loop()
+                threading.Thread(target=self._loop.run_forever, name="llm-hedge", daemon=True).start()
+            return self._loop
+
+    def call(
+        self,
+        fn: Callable[[], Awaitable[T]],
+        hedge_after_s: Optional[float],
+        budget: HedgeBudget,
+        timeout_s: Optional[float] = None,
+        on_hedge: Optional[Callable[[bool, bool], None]] = None,
+    ) -> T:
+        """
+        Run the coroutine returned by fn, firing a duplicate if it has not
+        finished after hedge_after_s and the budget allows. The first
+        successful reply wins and the loser is cancelled. Blocks the calling
+        thread, whose context variables the calls run with.
+
+        on_hedge(won, loser_cancelled) is called once a hedge has been fired,
+        with whether it won and whether a call still running was cancelled.
+        """
+        budget.record_call()
+        context = contextvars.copy_context()
+        race = self._race(fn, context, hedge_after_s, budget, timeout_s, on_hedge)
+        return asyncio.run_coroutine_threadsafe(race, self._event_loop()).result()
+
+    async def _race(
+        self,
+        fn: Callable[[], Awaitable[T]],
+        context: contextvars.Context,
+        hedge_after_s: Optional[float],
+        budget: HedgeBudget,
+        timeout_s: Optional[float],
+        on_hedge: Optional[Callable[[bool, bool], None]],
+    ) -> T:
+        loop = asyncio.get_running_loop()
+        deadline_at = None if timeout_s is None else loop.time() + timeout_s
+        # Each task copies the caller's context, so lane, caller and span apply
+        tasks = [context.run(asyncio.ensure_future, fn())]
+        winner = None
+        try:
+            if hedge_after_s is not None:
+                first_wait = hedge_after_s if deadline_at is None else min(hedge_after_s, deadline_at - loop.time())
+                done, _ = await asyncio.wait(tasks, timeout=max(0.0, first_wait))
+                if not done and (deadline_at is None or loop.time() < deadline_at) and budget.try_spend():
+                    tasks.append(context.run(asyncio.ensure_future, fn()))
+            winner = await _first_success(tasks, deadline_at)
+        finally:
+            still_running = [task for task in tasks if not task.done()]
+            for task in still_running:
+                task.cancel()
+            # Let cancelled calls unwind so their slots are free before returning
+            await asyncio.gather(*still_running, return_exceptions=True)
+            if len(tasks) > 1 and on_hedge is not None:
+                on_hedge(winner is tasks[1], bool(still_running))
+        return winner.result()
@@ -0,0 +1,167 @@
+"""
+Shared, tuned HTTP connection pool for all Gemini calls.
+
+One httpx client is handed to genai.Client so every call reuses kept-alive
+connections (HTTP/2 when the h2 package is installed), with the pool
+sized to the Gemini concurrency cap and separate connect and read
+timeouts. Connection reuse and pool utilization are tracked so the pool
+can be sized from real traffic.
+"""
+import importlib.util
+import threading
+from typing import Any, Dict
+
+import httpx
+
+from app.core.config import settings
+
+
+HTTP2_AVAILABLE = importlib.util.find_spec("h2") is not None
+
+
+class ConnectionStats:
+    """Counts requests, new connections and TLS handshakes via httpcore trace events."""
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self.requests = 0
+        self.new_connections = 0
+        self.tls_handshakes = 0
+
+    def trace(self, event_name: str, info: Dict[str, Any]) -> None:
+        if event_name == "connection.connect_tcp.complete":
+            with self._lock:
+                self.new_connections += 1
+        elif event_name == "connection.start_tls.complete":
+            with self._lock:
+                self.tls_handshakes += 1
+
+    async def async_trace(self, event_name: str, info: Dict[str, Any]) -> None:
+        """httpcore requires a coroutine trace callback on async connections."""
+        self.trace(event_name, info)
+
+    def on_request(self, request: httpx.Request) -> None:
+        """
+        Request hook: count the request, attach the tracer and apply separate
+        connect/read timeouts, keeping any shorter per-call timeout.
+        """
+        with self._lock:
+            self.requests += 1
+        request.extensions["trace"] = self.trace
+
+        per_call = request.extensions.get("timeout", {}).get("read")
+        read_timeout = settings.llm_http_read_timeout
+        if per_call is not None:
+            read_timeout = min(per_call, read_timeout)
+        request.extensions["timeout"] = {
+            "connect": min(settings.llm_http_connect_timeout, read_timeout),
+            "read": read_timeout,
+            "write": read_timeout,
+            "pool": settings.llm_http_connect_timeout,
+        }
+
+
+def build_llm_http_client(stats: ConnectionStats) -> httpx.Client:
+    """
+    Build the shared httpx client used by the Gemini SDK.
+    """
+    pool_size = max(1, settings.llm_concurrency)
+    return httpx.Client(
+        http2=HTTP2_AVAILABLE,
+        limits=httpx.Limits(
+            max_connections=pool_size,
+            max_keepalive_connections=pool_size,
+            keepalive_expiry=settings.llm_http_keepalive_expiry,
+        ),
+        timeout=httpx.Timeout(
+            settings.llm_http_read_timeout,
+            connect=settings.llm_http_connect_timeout,
+        ),
+        event_hooks={"request": [stats.on_request]},
+    )
+
+
+def build_llm_async_http_transport() -> httpx.AsyncHTTPTransport:
+    """
+    Build the pooled async transport used for hedged (cancellable) Gemini calls.
+    """
+    pool_size = max(1, settings.llm_concurrency)
+    return httpx.AsyncHTTPTransport(
+        http2=HTTP2_AVAILABLE,
+        limits=httpx.Limits(
+            max_connections=pool_size,
+            max_keepalive_connections=pool_size,
+            keepalive_expiry=settings.llm_http_keepalive_expiry,
+        ),
+    )
+
+
+def build_llm_async_http_client(
+    stats: ConnectionStats,
+    transport: httpx.AsyncHTTPTransport,
+) -> httpx.AsyncClient:
+    """
+    Build the async httpx client used by the Gemini SDK's aio calls.
+    Requests are counted and timed by the same stats as the sync client.
+    """
+    async def on_request(request: httpx.Request) -> None:
+        stats.on_request(request)
+        request.extensions["trace"] = stats.async_trace
+
+    return httpx.AsyncClient(
+        transport=transport,
+        timeout=httpx.Timeout(
+            settings.llm_http_read_timeout,
+            connect=settings.llm_http_connect_timeout,
+        ),
+        event_hooks={"request": [on_request]},
+    )
+
+
+def _pool_usage(client: Any) -> Dict[str, int]:
+    pool = getattr(getattr(client, "_transport", None), "_pool", None)
+    connections = list(getattr(pool, "connections", []))
+    busy = sum(1 for connection in connections if not connection.is_idle())
+    return {
+        "open_connections": len(connections),
+        "busy_connections": busy,
+        "idle_connections": len(connections) - busy,
+    }
+
+
+def pool_snapshot(clients: Dict[str, Any], stats: ConnectionStats) -> Dict[str, Any]:
+    """
+    Report pool utilization and connection reuse for the shared clients.
+
+    clients maps a name to an httpx client (e.g. the sync pool and the async
+    pool used for hedged calls); each is reported under "pools", and the
+    top-level connection counts are totals across them. Utilization is
+    against LLM_CONCURRENCY, which caps Gemini calls across all pools.
+    """
+    max_connections = max(1, settings.llm_concurrency)
+    pools = {}
+    for name, client in clients.items():
+        usage = _pool_usage(client)
+        usage["utilization"] = round(usage["busy_connections"] / max_connections, 4)
+        pools[name] = usage
+    open_connections = sum(pool["open_connections"] for pool in pools.values())
+    busy = sum(pool["busy_connections"] for pool in pools.values())
+
+    with stats._lock:
+        requests = stats.requests
+        new_connections = stats.new_connections
+        tls_handshakes = stats.tls_handshakes
+
+    return {
+        "http2": HTTP2_AVAILABLE,
+        "max_connections": max_connections,
+        "open_connections": open_connections,
+        "busy_connections": busy,
+        "idle_connections": open_connections - busy,
+        "utilization": round(busy / max_connections, 4),
+        "pools": pools,
+        "requests": requests,
+        "new_connections": new_connections,
+        "tls_handshakes": tls_handshakes,
+        "connection_reuse_rate": round(1 - new_connections / requests, 4) if requests else 0.0,
+    }
@@ -0,0 +1,113 @@
+"""
+Process-wide counters for Gemini calls, reported per model tier.
+"""
+import threading
+from collections import defaultdict
+from typing import Dict, Optional
+
+from app.core.config import settings
+
+
+def estimate_cost_usd(model: str, input_tokens: int, output_tokens: int) -> float:
+    """
+    Estimate the USD cost of a call from its token usage and the configured pricing.
+    """
+    input_price, output_price = settings.gemini_model_pricing.get(model, (0.0, 0.0))
+    return (input_tokens * input_price + output_tokens * output_price) / 1_000_000
+
+
+class LLMMetrics:
+    """Thread-safe latency, token and cost counters keyed by model."""
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._models: Dict[str, Dict[str, float]] = defaultdict(self._empty_counters)
+        self.escalations = 0
+        self.cancellations: Dict[str, int] = defaultdict(int)
+        self.hedges = {"fired": 0, "won": 0, "losers_cancelled": 0}
+        self.compaction = {"documents": 0, "tokens_before": 0, "tokens_after": 0, "tokens_saved": 0}
+
+    @staticmethod
+    def _empty_counters() -> Dict[str, float]:
+        return {
+            "calls": 0,
+            "errors": 0,
+            "total_latency_s": 0.0,
+            "max_latency_s": 0.0,
+            "input_tokens": 0,
+            "output_tokens": 0,
+            "cost_usd": 0.0,
+        }
+
+    def record_call(
+        self,
+        model: str,
+        latency_s: float,
+        usage: Optional[object] = None,
+        error: bool = False,
+    ) -> None:
+        """
+        Record one generate_content call. usage is the response's usage_metadata.
+        """
+        input_tokens = getattr(usage, "prompt_token_count", None) or 0
+        output_tokens = getattr(usage, "candidates_token_count", None) or 0
+        with self._lock:
+            counters = self._models[model]
+            counters["calls"] += 1
+            counters["errors"] += int(error)
+            counters["total_latency_s"] += latency_s
+            counters["max_latency_s"] = max(counters["max_latency_s"], latency_s)
+            counters["input_tokens"] += input_tokens
+            counters["output_tokens"] += output_tokens
+            counters["cost_usd"] += estimate_cost_usd(model, input_tokens, output_tokens)
+
+    def record_escalation(self) -> None:
+        """Record a chunk being re-run on the fallback model."""
+        with self._lock:
+            self.escalations += 1
+
+    def record_hedge(self, won: bool, loser_cancelled: bool = False) -> None:
+        """Record a hedged duplicate call, whether it beat the original and whether the loser was cancelled."""
+        with self._lock:
+            self.hedges["fired"] += 1
+            self.hedges["won"] += int(won)
+            self.hedges["losers_cancelled"] += int(loser_cancelled)
+
+    def record_cancellation(self, reason: str) -> None:
+        """Record a request stopped by deadline or client disconnect (not counted as an error)."""
+        with self._lock:
+            self.cancellations[reason] += 1
+
+    def record_compaction(self, stats: Dict[str, int]) -> None:
+        """Add one document's input compaction stats to the running totals."""
+        with self._lock:
+            self.compaction["documents"] += 1
+            for key in ("tokens_before", "tokens_after", "tokens_saved"):
+                self.compaction[key] += stats[key]
+
+    def snapshot(self) -> Dict:
+        """
+        Return a copy of all counters with average latency filled in.
+        """
+        with self._lock:
+            models = {}
+            for model, counters in self._models.items():
+                summary = dict(counters)
+                summary["avg_latency_s"] = (
+                    round(counters["total_latency_s"] / counters["calls"], 4)
+                    if counters["calls"] else 0.0
+                )
+                summary["total_latency_s"] = round(counters["total_latency_s"], 4)
+                summary["max_latency_s"] = round(counters["max_latency_s"], 4)
+                summary["cost_usd"] = round(counters["cost_usd"], 6)
+                models[model] = summary
+            return {
+                "models": models,
+                "escalations": self.escalations,
+                "cancellations": dict(self.cancellations),
+                "hedges": dict(self.hedges),
+                "compaction": dict(self.compaction),
+            }
+
+
+llm_metrics = LLMMetrics()
@@ -2,46 +2,93 @@
 PDF extraction service using pdfplumber library.
 """
 import pdfplumber
-from typing import Dict, Any, Tuple, Optional
+from typing import Dict, Any, List, Tuple, Optional
+from app.core.config import settings
+from app.core.deadline import Deadline
+from app.core.tracing import span
 from app.services.gemini_service import get_structured_response_chunked
+from app.services.llm_metrics import llm_metrics
+from app.services.table_parser import parse_known_tables
+from app.services.text_compaction import compact_pages, drop_parsed_tables
 
 
 class PDFExtractionService:
     """Service for extracting information from PDF order forms."""
     
     @staticmethod
-    def extract_text_and_tables_from_pdf(file_path: str) -> str:
+    def extract_pages(file_path: str, deadline: Optional[Deadline] = None) -> List[Dict[str, Any]]:
         """
-        Extract all text and tables from a PDF file using pdfplumber,
-        and combine them into a single text output suitable for processing.
+        Extract the text and tables of every page of a PDF file using pdfplumber.
 
         Args:
             file_path (str): Path to the PDF file.
+            deadline (Deadline): Checked between pages; raises ExtractionCancelled once passed.
 
         Returns:
-            str: Combined text and table contents.
+            List[Dict[str, Any]]: One dict per page with "page_number",
+            "text" and "tables" (each table a list of rows of cell strings).
         """
-        combined_text = []
+        pages = []
 
         with pdfplumber.open(file_path) as pdf:
             for page_number, page in enumerate(pdf.pages, start=1):
+                if deadline is not None:
+                    deadline.check()
+                with span("pdf.page", page_number=page_number):
+                    with span("pdf.page.text"):
+                        page_text = page.extract_text() or ""
+                    with span("pdf.page.tables"):
+                        tables = [table for table in page.extract_tables() if table]
+                pages.append({
+                    "page_number": page_number,
+                    "text": page_text,
+                    "tables": tables,
+                })
+
+        return pages
 
-                page_text = page.extract_text() or ""
-                combined_text.append(f"\n=== PAGE {page_number} TEXT ===\n{page_text.strip()}\n")
+    @staticmethod
+    def format_pages(pages: List[Dict[str, Any]]) -> str:
+        """
+        Combine extracted pages into a single text output suitable for processing.
+
+        Args:
+            pages (List[Dict[str, Any]]): Output of extract_pages.
+
+        Returns:
+            str: Combined text and table contents.
+        """
+        combined_text = []
 
-                tables = page.extract_tables()
-                for table_index, table in enumerate(tables, start=1):
-                    if not table:
-                        continue
+        for page in pages:
+            page_number = page["page_number"]
+            combined_text.append(f"\n=== PAGE {page_number} TEXT ===\n{page['text'].strip()}\n")
 
-                    combined_text.append(f"\n=== PAGE {page_number} TABLE {table_index} ===\n")
+            for table_index, table in enumerate(page["tables"], start=1):
+                combined_text.append(f"\n=== PAGE {page_number} TABLE {table_index} ===\n")
 
-                    for row in table:
-                        clean_row = [cell.strip() if cell else "" for cell in row]
-                        combined_text.append(" | ".join(clean_row))
-                    combined_text.append("\n")
+                for row in table:
+                    clean_row = [cell.strip() if cell else "" for cell in row]
+                    combined_text.append(" | ".join(clean_row))
+                combined_text.append("\n")
 
         return "\n".join(combined_text)
+
+    @staticmethod
+    def extract_text_and_tables_from_pdf(file_path: str) -> str:
+        """
+        Extract all text and tables from a PDF file using pdfplumber,
+        and combine them into a single text output suitable for processing.
+
+        Args:
+            file_path (str): Path to the PDF file.
+
+        Returns:
+            str: Combined text and table contents.
+        """
+        return PDFExtractionService.format_pages(
+            PDFExtractionService.extract_pages(file_path)
+        )
     
     @staticmethod
     def get_default_structure() -> Dict[str, Any]:
@@ -77,25 +124,56 @@ class PDFExtractionService:
         }
     
     @staticmethod
-    def extract_order_form_data(file_path: str, use_ai: bool = True) -> Tuple[str, Dict[str, Any]]:
+    def extract_order_form_data(
+        file_path: str,
+        use_ai: bool = True,
+        deadline: Optional[Deadline] = None,
+        raise_on_llm_error: bool = False
+    ) -> Tuple[str, Dict[str, Any]]:
         """
         Extract order form data from PDF file.
         
         Args:
             file_path (str): Path to the PDF file
             use_ai (bool): Whether to use Gemini AI for structured extraction
+            deadline (Deadline): Optional deadline; raises ExtractionCancelled once passed
+            raise_on_llm_error (bool): Raise Gemini errors instead of falling back
+                to the default (empty) structure
             
         Returns:
             tuple: (raw_text, structured_data)
         """
-        raw_text = PDFExtractionService.extract_text_and_tables_from_pdf(file_path)
+        pages = PDFExtractionService.extract_pages(file_path, deadline)
+        raw_text = PDFExtractionService.format_pages(pages)
+
+        # Pricing-grid and add-on tables with a known layout are parsed
+        # directly and kept out of the LLM input.
+        parsed_sections, recognized_tables = {}, set()
+        if settings.table_parser_enabled:
+            with span("table_parser"):
+                parsed_sections, recognized_tables = parse_known_tables(pages)
         
         if use_ai:
-            structured_data = get_structured_response_chunked(raw_text)
+            if settings.input_compaction_enabled:
+                with span("compaction"):
+                    llm_text, compaction_stats = compact_pages(pages, raw_text, recognized_tables)
+                llm_metrics.record_compaction(compaction_stats)
+            else:
+                llm_text = PDFExtractionService.format_pages(drop_parsed_tables(pages, recognized_tables))
+            structured_data = get_structured_response_chunked(
+                llm_text,
+                deadline=deadline,
+                raise_on_error=raise_on_llm_error,
+                skip_sections=set(parsed_sections)
+            )
             if structured_data is None:
                 structured_data = PDFExtractionService.get_default_structure()
         else:
             structured_data = PDFExtractionService.get_default_structure()
+
+        for section, records in parsed_sections.items():
+            structured_data[section] = records
+            structured_data.setdefault("section_tiers", {})[section] = ["table_parser"]
         
         return raw_text, structured_data
 
@@ -0,0 +1,237 @@
+"""
+Deterministic parser for the fixed-layout pricing-grid and add-on module tables.
+
+Works on pdfplumber's page.extract_tables() output, recognizes the tables
+by their header signature and maps their rows straight into PlanCatalog
+and ClientModule records, so these sections need no LLM call.
+"""
+import re
+from typing import Any, Dict, List, Optional, Set, Tuple
+
+from pydantic import ValidationError
+
+from app.models.schemas import ClientModule, PlanCatalog
+from app.services.chunk_validation import PLAN_RANGES
+
+
+Table = List[List[Optional[str]]]
+
+UNIT_TYPES = {
+    "Per Employee Per Payroll": ("employee", "payroll"),
+    "Per Employee Per Year": ("employee", "year"),
+    "Per EIN Per Month": ("ein",),
+    "Per Garnishment Per Payroll": ("garnishment",),
+}
+
+
+def _clean(cell: Optional[str]) -> str:
+    return re.sub(r"\s+", " ", cell or "").strip()
+
+
+def _key(text: str) -> str:
+    """Lowercase header text with "bi-weekly"/"bi weekly" folded to "biweekly"."""
+    return re.sub(r"bi[\s-]*weekly", "biweekly", text.lower())
+
+
+def parse_money(value: Optional[str]) -> Optional[float]:
+    """
+    Parse "$1,250.00" style cells; returns None for blank or non-numeric cells.
+    """
+    match = re.search(r"-?\d[\d,]*(?:\.\d+)?", value or "")
+    if not match:
+        return None
+    return float(match.group().replace(",", ""))
+
+
+def parse_bracket(value: Optional[str]) -> Optional[str]:
+    """
+    Map an employee range cell ("1-50", "01 - 50", "100+", "101+") to its catalog label.
+    """
+    text = _clean(value).replace("–", "-")
+    if re.search(r"\b(100|101)\s*\+|over\s*100|101\s*-\s*10,?000", text, re.IGNORECASE):
+        return "100+"
+    match = re.search(r"(\d+)\s*-\s*(\d+)", text)
+    if match:
+        low, high = int(match.group(1)), int(match.group(2))
+        for label, bounds in PLAN_RANGES.items():
+            if (low, high) == bounds:
+                return label
+    return None
+
+
+def _header_labels(table: Table, header_rows: int) -> List[str]:
+    """
+    Combine the first header_rows rows into one label per column.
+    In all but the last header row, blank cells to the right of a label are
+    treated as part of a spanning cell ("Weekly" over "Base Fee | Per Check").
+    """
+    width = max(len(row) for row in table)
+    labels = [""] * width
+    for row_index, row in enumerate(table[:header_rows]):
+        spanning = row_index < header_rows - 1
+        carried = ""
+        for col in range(width):
+            part = _clean(row[col]) if col < len(row) else ""
+            if part:
+                carried = part
+            elif spanning:
+                part = carried
+            if part and part not in labels[col]:
+                labels[col] = f"{labels[col]} {part}".strip()
+    return [_key(label) for label in labels]
+
+
+def _find_column(labels: List[str], *required: str, exclude: Tuple[str, ...] = ()) -> Optional[int]:
+    for col, label in enumerate(labels):
+        if all(word in label for word in required) and not any(word in label for word in exclude):
+            return col
+    return None
+
+
+def _first_data_row(table: Table) -> int:
+    """Number of header rows: rows before the first row that starts with an employee bracket."""
+    for index, row in enumerate(table):
+        if row and parse_bracket(row[0]):
+            return index
+    return len(table)
+
+
+def parse_plan_catalog(table: Table) -> List[Dict[str, Any]]:
+    """
+    Parse the pricing grid. Returns an empty list if the table does not match its signature.
+    """
+    header_rows = _first_data_row(table)
+    if header_rows == 0 or header_rows == len(table):
+        return []
+
+    labels = _header_labels(table, header_rows)
+    columns = {
+        "one_time_implementation_fee": _find_column(labels, "implementation"),
+        "weekly_base_fee": _find_column(labels, "weekly", "base", exclude=("biweekly",)),
+        "weekly_per_check": _find_column(labels, "weekly", "check", exclude=("biweekly",)),
+        "biweekly_base_fee": _find_column(labels, "biweekly", "base"),
+        "biweekly_per_check": _find_column(labels, "biweekly", "check"),
+    }
+    if sum(col is not None for col in columns.values()) < 2:
+        return []
+
+    plans = []
+    for row in table[header_rows:]:
+        label = parse_bracket(row[0]) if row else None
+        if label is None:
+            continue
+        low, high = PLAN_RANGES[label]
+        plan = {
+            "employee_range_min": low,
+            "employee_range_max": high,
+            "employee_range_label": label,
+        }
+        for field, col in columns.items():
+            plan[field] = parse_money(row[col]) if col is not None and col < len(row) else None
+        try:
+            plans.append(PlanCatalog(**plan).model_dump())
+        except ValidationError:
+            continue
+    return plans
+
+
+def parse_unit_type(value: Optional[str]) -> Optional[str]:
+    """Map free text such as "/employee/payroll" onto one of the ClientModule unit types."""
+    text = _clean(value).lower()
+    for unit_type, words in UNIT_TYPES.items():
+        if all(word in text for word in words):
+            return unit_type
+    return None
+
+
+def _frequency(text: str) -> Optional[str]:
+    text = text.lower()
+    if re.search(r"month|\bmo\b", text):
+        return "Monthly"
+    if re.search(r"year|annual|\byr\b", text):
+        return "Yearly"
+    return None
+
+
+def parse_add_on_modules(table: Table) -> List[Dict[str, Any]]:
+    """
+    Parse the add-on modules table. Returns an empty list if the table does not match its signature.
+    """
+    if len(table) < 2:
+        return []
+
+    labels = _header_labels(table, 1)
+    name_col = _find_column(labels, "module")
+    if name_col is None or not any("fee" in label or "unit" in label for label in labels):
+        return []
+
+    subscription_col = _find_column(labels, "subscription")
+    if subscription_col is None:
+        subscription_col = _find_column(labels, "total")
+    fee_col = next(
+        (col for col in range(len(labels))
+         if col not in (name_col, subscription_col)
+         and any(word in labels[col] for word in ("fee", "rate", "price"))),
+        None,
+    )
+    unit_type_col = _find_column(labels, "unit", "type")
+    units_col = next(
+        (col for col in range(len(labels))
+         if col not in (unit_type_col, fee_col)
+         and any(word in labels[col] for word in ("units", "quantity", "qty", "count"))),
+        None,
+    )
+    header_frequency = _frequency(labels[subscription_col]) if subscription_col is not None else None
+
+    def cell(row: List[Optional[str]], col: Optional[int]) -> str:
+        return _clean(row[col]) if col is not None and col < len(row) else ""
+
+    modules = []
+    for row in table[1:]:
+        name = cell(row, name_col)
+        if not name or name.lower().startswith("total"):
+            continue
+        fee_text = cell(row, fee_col)
+        units = parse_money(cell(row, units_col))
+        subscription_text = cell(row, subscription_col)
+        module = {
+            "module_name": name,
+            "fee_per_unit": parse_money(fee_text),
+            "unit_type": parse_unit_type(cell(row, unit_type_col) or fee_text),
+            "units": int(units) if units is not None else None,
+            "subscription_fee": parse_money(subscription_text),
+            "subscription_fee_frequency": _frequency(subscription_text) or header_frequency,
+        }
+        try:
+            modules.append(ClientModule(**module).model_dump())
+        except ValidationError:
+            continue
+    return modules
+
+
+def parse_known_tables(pages: List[Dict[str, Any]]) -> Tuple[Dict[str, List[Dict[str, Any]]], Set[Tuple[int, int]]]:
+    """
+    Recognize the pricing grid and add-on tables across all pages.
+
+    Args:
+        pages: Output of PDFExtractionService.extract_pages.
+
+    Returns:
+        tuple: (sections, recognized) where sections maps "plan_catalog" and
+        "add_on_modules" to parsed records (only for sections found) and
+        recognized holds (page_number, table_index) of the consumed tables,
+        with table_index starting at 1.
+    """
+    sections: Dict[str, List[Dict[str, Any]]] = {}
+    recognized: Set[Tuple[int, int]] = set()
+
+    for page in pages:
+        for table_index, table in enumerate(page["tables"], start=1):
+            for section, parser in (("plan_catalog", parse_plan_catalog), ("add_on_modules", parse_add_on_modules)):
+                records = parser(table)
+                if records:
+                    sections.setdefault(section, []).extend(records)
+                    recognized.add((page["page_number"], table_index))
+                    break
+
+    return sections, recognized
@@ -0,0 +1,172 @@
+"""
+Compaction of extracted PDF content before it is sent to Gemini.
+
+Drops redundancy that costs tokens without adding information: runs of
+whitespace, page counters, repeats of headers and footers found on every
+page (the first copy is kept), page text that duplicates a table row, and
+empty table cells and columns.
+"""
+import math
+import re
+from collections import Counter
+from typing import Any, Dict, List, Optional, Set, Tuple
+
+
+# Lines this close to the top or bottom of a page are header/footer candidates
+EDGE_LINES = 3
+
+# A candidate line is treated as a header/footer when it appears on this share of pages
+REPEAT_RATIO = 0.6
+
+
+def estimate_tokens(text: str) -> int:
+    """
+    Rough token count for Gemini input (about four characters per token).
+    """
+    return math.ceil(len(text) / 4)
+
+
+def _collapse(text: str) -> str:
+    return re.sub(r"\s+", " ", text).strip()
+
+
+def _edge_signature(line: str) -> str:
+    """Header/footer match key; page counters are masked so "Page 2 of 5" matches "Page 3 of 5"."""
+    line = line.lower()
+    if re.search(r"\bpage\b", line):
+        return re.sub(r"\d+", "#", line)
+    return line
+
+
+def _is_page_counter(signature: str) -> bool:
+    return "#" in signature and re.search(r"\bpage\b", signature) is not None
+
+
+def _page_lines(text: str) -> List[str]:
+    lines = (_collapse(line) for line in text.splitlines())
+    return [line for line in lines if line]
+
+
+def _repeated_edge_lines(pages_lines: List[List[str]]) -> set:
+    if len(pages_lines) < 2:
+        return set()
+
+    counts: Counter = Counter()
+    for lines in pages_lines:
+        edges = lines[:EDGE_LINES] + lines[-EDGE_LINES:]
+        counts.update({_edge_signature(line) for line in edges})
+
+    threshold = max(2, math.ceil(len(pages_lines) * REPEAT_RATIO))
+    return {signature for signature, count in counts.items() if count >= threshold}
+
+
+def compact_table(table: List[List[Optional[str]]]) -> List[List[str]]:
+    """
+    Normalize cell whitespace and drop empty rows and empty columns.
+    """
+    rows = [[_collapse(cell) if cell else "" for cell in row] for row in table]
+    rows = [row for row in rows if any(row)]
+    if not rows:
+        return []
+
+    width = max(len(row) for row in rows)
+    rows = [row + [""] * (width - len(row)) for row in rows]
+    keep = [col for col in range(width) if any(row[col] for row in rows)]
+    return [[row[col] for col in keep] for row in rows]
+
+
+def drop_parsed_tables(
+    pages: List[Dict[str, Any]],
+    skip_tables: Set[Tuple[int, int]],
+) -> List[Dict[str, Any]]:
+    """
+    Remove tables already parsed deterministically, and the page text lines
+    that duplicate their rows, from extracted pages (used when compaction is off).
+    """
+    result = []
+    for page in pages:
+        parsed = [
+            table for table_index, table in enumerate(page["tables"], start=1)
+            if (page["page_number"], table_index) in skip_tables
+        ]
+        if not parsed:
+            result.append(page)
+            continue
+        table_rows = {" ".join(cell for cell in row if cell) for table in parsed for row in compact_table(table)}
+        result.append({
+            **page,
+            "text": "\n".join(line for line in page["text"].splitlines() if _collapse(line) not in table_rows),
+            "tables": [
+                table for table_index, table in enumerate(page["tables"], start=1)
+                if (page["page_number"], table_index) not in skip_tables
+            ],
+        })
+    return result
+
+
+def compact_pages(
+    pages: List[Dict[str, Any]],
+    original_text: Optional[str] = None,
+    skip_tables: Optional[Set[Tuple[int, int]]] = None,
+) -> Tuple[str, Dict[str, int]]:
+    """
+    Build compact LLM input from the output of PDFExtractionService.extract_pages.
+
+    Args:
+        pages: Extracted pages with "page_number", "text" and "tables".
+        original_text: The uncompacted text, used only to report savings.
+        skip_tables: (page_number, table_index) of tables already parsed
+            deterministically; they are left out of the output together
+            with the page text that duplicates them.
+
+    Returns:
+        tuple: (compacted_text, stats) where stats holds estimated tokens
+        before and after compaction and the tokens saved.
+    """
+    pages_lines = [_page_lines(page["text"]) for page in pages]
+    repeated = _repeated_edge_lines(pages_lines)
+    seen_edges = set()
+
+    output = []
+    for page, lines in zip(pages, pages_lines):
+        tables = [
+            (table_index, compact_table(table))
+            for table_index, table in enumerate(page["tables"], start=1)
+        ]
+        table_rows = {" ".join(cell for cell in row if cell) for _, table in tables for row in table}
+        tables = [
+            table for table_index, table in tables
+            if table and (page["page_number"], table_index) not in (skip_tables or set())
+        ]
+
+        last_index = len(lines) - 1
+        kept_lines = []
+        for index, line in enumerate(lines):
+            if line in table_rows:
+                continue
+            if index < EDGE_LINES or index > last_index - EDGE_LINES:
+                signature = _edge_signature(line)
+                if signature in repeated:
+                    # Page counters carry nothing; other repeated headers may
+                    # hold data (e.g. the client line), so the first copy stays
+                    if _is_page_counter(signature) or signature in seen_edges:
+                        continue
+                    seen_edges.add(signature)
+            kept_lines.append(line)
+
+        output.append(f"\n=== PAGE {page['page_number']} TEXT ===")
+        output.extend(kept_lines)
+        for table_index, table in enumerate(tables, start=1):
+            output.append(f"=== PAGE {page['page_number']} TABLE {table_index} ===")
+            output.extend("|".join(row) for row in table)
+
+    compacted_text = "\n".join(output)
+
+    tokens_after = estimate_tokens(compacted_text)
+    tokens_before = estimate_tokens(original_text) if original_text is not None else tokens_after
+    stats = {
+        "tokens_before": tokens_before,
+        "tokens_after": tokens_after,
+        "tokens_saved": tokens_before - tokens_after,
+    }
+    return compacted_text, stats
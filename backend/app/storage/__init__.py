@@ -0,0 +1,3 @@
+from .results_store import ResultsStore, results_store
+
+__all__ = ["ResultsStore", "results_store"]
@@ -0,0 +1,315 @@
+"""
+Local SQLite store for extraction and submission results.
+
+Lets lookups and re-display of past order forms be served without
+re-extracting the PDF or reading back the Google Sheet.
+"""
+import json
+import re
+import sqlite3
+import uuid
+from contextlib import contextmanager
+from datetime import date, datetime, timedelta, timezone
+from pathlib import Path
+from typing import Any, Dict, Iterator, List, Optional, Tuple
+
+from app.core.config import settings
+from app.models.schemas import (
+    ExtractionResponse,
+    FinalSubmissionResponse,
+    OrderFormData,
+    StoredExtraction,
+    StoredSubmission,
+)
+
+
+SCHEMA = """
+CREATE TABLE IF NOT EXISTS extractions (
+    extraction_id TEXT PRIMARY KEY,
+    created_at TEXT NOT NULL,
+    source_filename TEXT,
+    success INTEGER NOT NULL,
+    dsp_fein TEXT,
+    dsp_code TEXT,
+    dsp_name TEXT,
+    initial_term_start_date TEXT,
+    payload TEXT NOT NULL
+);
+CREATE INDEX IF NOT EXISTS idx_extractions_dsp_fein ON extractions (dsp_fein);
+CREATE INDEX IF NOT EXISTS idx_extractions_dsp_code ON extractions (dsp_code);
+CREATE INDEX IF NOT EXISTS idx_extractions_term_start ON extractions (initial_term_start_date);
+CREATE INDEX IF NOT EXISTS idx_extractions_created_at ON extractions (created_at);
+
+CREATE TABLE IF NOT EXISTS submissions (
+    submission_id TEXT PRIMARY KEY,
+    submitted_at TEXT NOT NULL,
+    submission_status TEXT,
+    success INTEGER NOT NULL,
+    dsp_fein TEXT,
+    dsp_code TEXT,
+    dsp_name TEXT,
+    initial_term_start_date TEXT,
+    payload TEXT NOT NULL
+);
+CREATE INDEX IF NOT EXISTS idx_submissions_dsp_fein ON submissions (dsp_fein);
+CREATE INDEX IF NOT EXISTS idx_submissions_dsp_code ON submissions (dsp_code);
+CREATE INDEX IF NOT EXISTS idx_submissions_term_start ON submissions (initial_term_start_date);
+CREATE INDEX IF NOT EXISTS idx_submissions_submitted_at ON submissions (submitted_at);
+"""
+
+
+def _normalize_fein(value: Optional[str]) -> Optional[str]:
+    """Keep only the digits of a FEIN so "47-1234567" and "471234567" match."""
+    if not value:
+        return value
+    return re.sub(r"\D", "", value) or value
+
+
+def _time_bound(value: str, upper: bool) -> Tuple[str, str]:
+    """
+    Turn an ISO 8601 date or datetime filter into a UTC timestamp comparable
+    with the stored ones, and the operator to compare with. A date-only upper
+    bound covers that whole day; naive datetimes are taken as UTC.
+    Raises ValueError for values that are not ISO 8601.
+    """
+    if re.fullmatch(r"\d{4}-\d{2}-\d{2}", value):
+        day = datetime.combine(date.fromisoformat(value), datetime.min.time(), timezone.utc)
+        if upper:
+            return (day + timedelta(days=1)).isoformat(), "<"
+        return day.isoformat(), ">="
+    moment = datetime.fromisoformat(value)
+    if moment.tzinfo is None:
+        moment = moment.replace(tzinfo=timezone.utc)
+    return moment.astimezone(timezone.utc).isoformat(), "<=" if upper else ">="
+
+
+def _term_start_bound(name: str, value: str) -> str:
+    """
+    Normalize a term start filter to the YYYY-MM-DD form the column stores.
+    Raises ValueError for values that are not ISO 8601 dates.
+    """
+    try:
+        return date.fromisoformat(value).isoformat()
+    except ValueError:
+        raise ValueError(f"{name} must be an ISO 8601 date (YYYY-MM-DD), got {value!r}")
+
+
+def _index_fields(data: Optional[OrderFormData]) -> Dict[str, Optional[str]]:
+    """
+    Pull the indexed columns out of an OrderFormData instance.
+    """
+    client = data.client if data else None
+    billing = data.billing_terms if data else None
+    start_date = billing.initial_term_start_date if billing else None
+    return {
+        "dsp_fein": _normalize_fein(client.dsp_fein) if client else None,
+        "dsp_code": client.dsp_code if client else None,
+        "dsp_name": client.dsp_name if client else None,
+        "initial_term_start_date": str(start_date) if start_date else None,
+    }
+
+
+def _build_filters(
+    dsp_fein: Optional[str],
+    dsp_code: Optional[str],
+    term_start_from: Optional[str],
+    term_start_to: Optional[str],
+    time_column: str,
+    time_from: Optional[str],
+    time_to: Optional[str],
+) -> Tuple[str, List[Any]]:
+    """
+    Build a WHERE clause over the indexed columns.
+    Raises ValueError if a term start bound is not an ISO 8601 date or a
+    time bound is not an ISO 8601 date or datetime.
+    """
+    clauses = []
+    params: List[Any] = []
+    if dsp_fein:
+        clauses.append("dsp_fein = ?")
+        params.append(_normalize_fein(dsp_fein))
+    if dsp_code:
+        clauses.append("dsp_code = ?")
+        params.append(dsp_code)
+    if term_start_from:
+        clauses.append("initial_term_start_date >= ?")
+        params.append(_term_start_bound("term_start_from", term_start_from))
+    if term_start_to:
+        clauses.append("initial_term_start_date <= ?")
+        params.append(_term_start_bound("term_start_to", term_start_to))
+    prefix = time_column.rsplit("_", 1)[0]
+    for name, bound, upper in ((f"{prefix}_from", time_from, False), (f"{prefix}_to", time_to, True)):
+        if bound:
+            try:
+                timestamp, operator = _time_bound(bound, upper)
+            except ValueError:
+                raise ValueError(f"{name} must be an ISO 8601 date or datetime, got {bound!r}")
+            clauses.append(f"{time_column} {operator} ?")
+            params.append(timestamp)
+    where = f"WHERE {' AND '.join(clauses)}" if clauses else ""
+    return where, params
+
+
+class ResultsStore:
+    """Embedded store of ExtractionResponse and FinalSubmissionResponse records."""
+
+    def __init__(self, db_path: Path):
+        self.db_path = Path(db_path)
+        self.db_path.parent.mkdir(parents=True, exist_ok=True)
+        with self._connect() as conn:
+            conn.execute("PRAGMA journal_mode=WAL")
+            conn.executescript(SCHEMA)
+
+    @contextmanager
+    def _connect(self) -> Iterator[sqlite3.Connection]:
+        conn = sqlite3.connect(str(self.db_path), timeout=10)
+        conn.row_factory = sqlite3.Row
+        try:
+            with conn:
+                yield conn
+        finally:
+            conn.close()
+
+    def save_extraction(
+        self,
+        response: ExtractionResponse,
+        source_filename: Optional[str] = None,
+    ) -> str:
+        """
+        Persist an extraction response and return its extraction_id.
+        """
+        extraction_id = response.extraction_id or str(uuid.uuid4())
+        response.extraction_id = extraction_id
+        fields = _index_fields(response.data)
+        with self._connect() as conn:
+            conn.execute(
+                """
+                INSERT OR REPLACE INTO extractions (
+                    extraction_id, created_at, source_filename, success,
+                    dsp_fein, dsp_code, dsp_name, initial_term_start_date, payload
+                ) VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?)
+                """,
+                (
+                    extraction_id,
+                    datetime.now(timezone.utc).isoformat(),
+                    source_filename,
+                    int(response.success),
+                    fields["dsp_fein"],
+                    fields["dsp_code"],
+                    fields["dsp_name"],
+                    fields["initial_term_start_date"],
+                    response.model_dump_json(),
+                ),
+            )
+        return extraction_id
+
+    def save_submission(self, response: FinalSubmissionResponse) -> str:
+        """
+        Persist a final submission response and return its submission_id.
+        """
+        submission_id = str(uuid.uuid4())
+        fields = _index_fields(response.submitted_data)
+        with self._connect() as conn:
+            conn.execute(
+                """
+                INSERT INTO submissions (
+                    submission_id, submitted_at, submission_status, success,
+                    dsp_fein, dsp_code, dsp_name, initial_term_start_date, payload
+                ) VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?)
+                """,
+                (
+                    submission_id,
+                    datetime.now(timezone.utc).isoformat(),
+                    response.submission_status,
+                    int(response.success),
+                    fields["dsp_fein"],
+                    fields["dsp_code"],
+                    fields["dsp_name"],
+                    fields["initial_term_start_date"],
+                    response.model_dump_json(),
+                ),
+            )
+        return submission_id
+
+    def get_extraction(self, extraction_id: str) -> Optional[StoredExtraction]:
+        """
+        Fetch a single stored extraction by id.
+        """
+        with self._connect() as conn:
+            row = conn.execute(
+                "SELECT * FROM extractions WHERE extraction_id = ?",
+                (extraction_id,),
+            ).fetchone()
+        return self._to_extraction(row) if row else None
+
+    def query_extractions(
+        self,
+        dsp_fein: Optional[str] = None,
+        dsp_code: Optional[str] = None,
+        term_start_from: Optional[str] = None,
+        term_start_to: Optional[str] = None,
+        created_from: Optional[str] = None,
+        created_to: Optional[str] = None,
+        page: int = 1,
+        page_size: int = 20,
+    ) -> Tuple[List[StoredExtraction], int]:
+        """
+        Return one page of stored extractions, newest first, and the total match count.
+        """
+        where, params = _build_filters(
+            dsp_fein, dsp_code, term_start_from, term_start_to,
+            "created_at", created_from, created_to,
+        )
+        with self._connect() as conn:
+            total = conn.execute(f"SELECT COUNT(*) FROM extractions {where}", params).fetchone()[0]
+            rows = conn.execute(
+                f"SELECT * FROM extractions {where} ORDER BY created_at DESC LIMIT ? OFFSET ?",
+                [*params, page_size, (page - 1) * page_size],
+            ).fetchall()
+        return [self._to_extraction(row) for row in rows], total
+
+    def query_submissions(
+        self,
+        dsp_fein: Optional[str] = None,
+        dsp_code: Optional[str] = None,
+        term_start_from: Optional[str] = None,
+        term_start_to: Optional[str] = None,
+        submitted_from: Optional[str] = None,
+        submitted_to: Optional[str] = None,
+        page: int = 1,
+        page_size: int = 20,
+    ) -> Tuple[List[StoredSubmission], int]:
+        """
+        Return one page of stored submissions, newest first, and the total match count.
+        """
+        where, params = _build_filters(
+            dsp_fein, dsp_code, term_start_from, term_start_to,
+            "submitted_at", submitted_from, submitted_to,
+        )
+        with self._connect() as conn:
+            total = conn.execute(f"SELECT COUNT(*) FROM submissions {where}", params).fetchone()[0]
+            rows = conn.execute(
+                f"SELECT * FROM submissions {where} ORDER BY submitted_at DESC LIMIT ? OFFSET ?",
+                [*params, page_size, (page - 1) * page_size],
+            ).fetchall()
+        return [self._to_submission(row) for row in rows], total
+
+    @staticmethod
+    def _to_extraction(row: sqlite3.Row) -> StoredExtraction:
+        return StoredExtraction(
+            extraction_id=row["extraction_id"],
+            created_at=row["created_at"],
+            source_filename=row["source_filename"],
+            response=ExtractionResponse(**json.loads(row["payload"])),
+        )
+
+    @staticmethod
+    def _to_submission(row: sqlite3.Row) -> StoredSubmission:
+        return StoredSubmission(
+            submission_id=row["submission_id"],
+            submitted_at=row["submitted_at"],
+            response=FinalSubmissionResponse(**json.loads(row["payload"])),
+        )
+
+
+results_store = ResultsStore(settings.results_db_path)
@@ -0,0 +1,361 @@
+"""
+Builder for the versioned golden set of synthetic order-form PDFs.
+
+Each case is described once as OrderFormData-shaped data; the builder lays
+it out as a two-page order form PDF (page text, pricing grid and add-on
+tables drawn as ruled tables so pdfplumber detects them) and writes the
+matching expected JSON next to it.
+
+Usage:
+    python -m benchmarks.golden_set [--version v1]
+"""
+import argparse
+import json
+from pathlib import Path
+from typing import Any, Dict, List, Tuple
+
+GOLDEN_DIR = Path(__file__).resolve().parent / "golden"
+
+PAGE_WIDTH = 612
+PAGE_HEIGHT = 792
+FONT_SIZE = 8
+
+
+# ---------- MINIMAL PDF WRITER ----------
+
+def _escape(text: str) -> str:
+    return text.replace("\\", "\\\\").replace("(", "\\(").replace(")", "\\)")
+
+
+class PdfPage:
+    """Collects text and ruled-line drawing operations for one page."""
+
+    def __init__(self):
+        self.ops: List[str] = []
+
+    def text(self, x: float, y: float, value: str) -> None:
+        self.ops.append(f"BT /F1 {FONT_SIZE} Tf {x} {y} Td ({_escape(value)}) Tj ET")
+
+    def line(self, x1: float, y1: float, x2: float, y2: float) -> None:
+        self.ops.append(f"{x1} {y1} m {x2} {y2} l S")
+
+    def table(self, x: float, top: float, widths: List[float], rows: List[List[str]], row_height: float = 16) -> float:
+        """Draw a ruled table and return the y coordinate just below it."""
+        right = x + sum(widths)
+        bottom = top - row_height * len(rows)
+        for index in range(len(rows) + 1):
+            y = top - index * row_height
+            self.line(x, y, right, y)
+        col_x = x
+        for width in widths + [0]:
+            self.line(col_x, top, col_x, bottom)
+            col_x += width
+        for row_index, row in enumerate(rows):
+            col_x = x
+            for width, cell in zip(widths, row):
+                if cell:
+                    self.text(col_x + 3, top - (row_index + 1) * row_height + 5, cell)
+                col_x += width
+        return bottom
+
+
+def write_pdf(pages: List[PdfPage]) -> bytes:
+    """Serialize pages into a minimal single-font PDF document."""
+    objects: List[bytes] = [b"<< /Type /Font /Subtype /Type1 /BaseFont /Helvetica >>"]
+    content_ids = []
+    for page in pages:
+        stream = "\n".join(page.ops).encode("latin-1")
+        objects.append(b"<< /Length %d >>\nstream\n" % len(stream) + stream + b"\nendstream")
+        content_ids.append(len(objects))
+
+    pages_id = len(objects) + len(pages) + 1
+    page_ids = []
+    for content_id in content_ids:
+        objects.append(
+            b"<< /Type /Page /Parent %d 0 R /MediaBox [0 0 %d %d] /Contents %d 0 R "
+            b"/Resources << /Font << /F1 1 0 R >> >> >>"
+            % (pages_id, PAGE_WIDTH, PAGE_HEIGHT, content_id)
+        )
+        page_ids.append(len(objects))
+    kids = b" ".join(b"%d 0 R" % page_id for page_id in page_ids)
+    objects.append(b"<< /Type /Pages /Kids [%s] /Count %d >>" % (kids, len(page_ids)))
+    objects.append(b"<< /Type /Catalog /Pages %d 0 R >>" % pages_id)
+
+    output = b"%PDF-1.4\n"
+    offsets = []
+    for number, body in enumerate(objects, start=1):
+        offsets.append(len(output))
+        output += b"%d 0 obj\n" % number + body + b"\nendobj\n"
+    xref = len(output)
+    output += b"xref\n0 %d\n0000000000 65535 f \n" % (len(objects) + 1)
+    output += b"".join(b"%010d 00000 n \n" % offset for offset in offsets)
+    output += b"trailer\n<< /Size %d /Root %d 0 R >>\nstartxref\n%d\n%%%%EOF\n" % (
+        len(objects) + 1, len(objects), xref
+    )
+    return output
+
+
+# ---------- ORDER FORM LAYOUT ----------
+
+def _money(value: float) -> str:
+    return f"${value:,.2f}"
+
+
+def _us_date(iso_date: str) -> str:
+    year, month, day = iso_date.split("-")
+    return f"{month}/{day}/{year}"
+
+
+def render_order_form(data: Dict[str, Any]) -> bytes:
+    """Lay out OrderFormData-shaped data as a two-page order form PDF."""
+    client = data["client"]
+    billing = data["billing_terms"]
+    selected = data["client_selected_plan"]
+    bank = data["bank_account"]
+
+    first, second = PdfPage(), PdfPage()
+    for number, page in enumerate((first, second), start=1):
+        page.text(40, 760, "Uzio Payroll Services - Order Form")
+        page.text(40, 30, f"Page {number} of 2")
+
+    lines: List[Tuple[float, str]] = [
+        (0, "CLIENT INFORMATION"),
+        (0, f"DSP Name: {client['dsp_name']}"),
+        (0, f"DSP Code: {client['dsp_code']}"),
+        (0, f"FEIN: {client['dsp_fein'][:2]}-{client['dsp_fein'][2:]}"),
+    ]
+    for contact in data["contacts"]:
+        lines += [
+            (0, f"{contact['contact_type']} Contact"),
+            (12, f"Name: {contact['name']}   Email: {contact['email']}   Phone: {contact['phone']}"),
+            (12, f"Address: {contact['address_line_1']}, {contact['city']}, {contact['state']} {contact['postal_code']}"),
+        ]
+    lines += [
+        (0, "BILLING TERMS"),
+        (0, f"Initial Term: {billing['initial_term_period']}   Renewal Term: {billing['renewal_term_period']}"),
+        (0, f"Billing Frequency: {billing['billing_frequency']}"),
+        (0, f"Initial Term Start Date: {_us_date(billing['initial_term_start_date'])}   "
+            f"Initial Term End Date: {_us_date(billing['initial_term_end_date'])}"),
+        (0, f"Estimated Employee Count: {billing['estimated_employee_count']}"),
+        (0, f"Estimated Total Subscription Fee: {_money(billing['estimated_total_subscription_fee'])}"),
+        (0, f"One-Time Setup Fee: {_money(billing['one_time_setup_fee'])}"),
+    ]
+    y = 735
+    for indent, value in lines:
+        first.text(40 + indent, y, value)
+        y -= 13
+
+    plan_rows = [
+        ["Employees", "Implementation Fee", "Weekly", "", "Bi-Weekly", ""],
+        ["", "", "Base Fee", "Per Check", "Base Fee", "Per Check"],
+    ]
+    for plan in data["plan_catalog"]:
+        plan_rows.append([
+            plan["employee_range_label"],
+            _money(plan["one_time_implementation_fee"]),
+            _money(plan["weekly_base_fee"]),
+            _money(plan["weekly_per_check"]),
+            _money(plan["biweekly_base_fee"]),
+            _money(plan["biweekly_per_check"]),
+        ])
+    first.text(40, y - 4, "PLAN CATALOG")
+    y = first.table(40, y - 10, [70, 100, 80, 80, 80, 80], plan_rows)
+    first.text(40, y - 16, f"Selected Plan: {selected['payroll_frequency']} payroll, "
+                           f"{selected['selected_employee_range']} employees")
+
+    module_rows = [["Module", "Fee Per Unit", "Unit Type", "Units", "Subscription Fee"]]
+    for module in data["add_on_modules"]:
+        frequency = "/yr" if module["subscription_fee_frequency"] == "Yearly" else "/mo"
+        module_rows.append([
+            module["module_name"],
+            _money(module["fee_per_unit"]),
+            module["unit_type"],
+            str(module["units"]),
+            _money(module["subscription_fee"]) + frequency,
+        ])
+    second.text(40, 735, "ADD-ON MODULES")
+    y = second.table(40, 725, [90, 70, 140, 40, 100], module_rows)
+
+    bank_lines = [
+        "BANK ACCOUNT",
+        f"Bank Name: {bank['bank_name']}",
+        f"Routing Number: {bank['routing_number']}",
+        f"Account Number: {bank['account_number']}",
+        f"Account Type: {bank['account_type']}",
+        "ADDITIONAL NOTES",
+        data["additional_notes"] or "",
+    ]
+    y -= 24
+    for value in bank_lines:
+        second.text(40, y, value)
+        y -= 13
+
+    return write_pdf([first, second])
+
+
+# Sections of OrderFormData laid out on each page by render_order_form,
+# used to answer fixture LLM calls page by page
+PAGE_SECTIONS = {
+    1: ["client", "contacts", "billing_terms", "plan_catalog", "client_selected_plan"],
+    2: ["add_on_modules", "bank_account", "additional_notes"],
+}
+
+
+# ---------- GOLDEN CASES ----------
+
+def _plan_catalog(fees: List[Tuple[float, float, float, float, float]]) -> List[Dict[str, Any]]:
+    brackets = [("01-50", 1, 50), ("51-100", 51, 100), ("100+", 101, 10000)]
+    return [
+        {
+            "employee_range_min": low,
+            "employee_range_max": high,
+            "employee_range_label": label,
+            "one_time_implementation_fee": implementation,
+            "weekly_base_fee": weekly_base,
+            "weekly_per_check": weekly_check,
+            "biweekly_base_fee": biweekly_base,
+            "biweekly_per_check": biweekly_check,
+        }
+        for (label, low, high), (implementation, weekly_base, weekly_check, biweekly_base, biweekly_check)
+        in zip(brackets, fees)
+    ]
+
+
+def _contact(contact_type: str, name: str, email: str, phone: str, address: str,
+             city: str, state: str, postal_code: str) -> Dict[str, Any]:
+    return {
+        "contact_type": contact_type,
+        "name": name,
+        "email": email,
+        "phone": phone,
+        "city": city,
+        "address_line_1": address,
+        "address_line_2": None,
+        "postal_code": postal_code,
+        "state": state,
+        "country": "USA",
+    }
+
+
+CASES: Dict[str, Dict[str, Any]] = {
+    "order_form_001": {
+        "client": {"dsp_name": "Swift Lane Logistics LLC", "dsp_code": "SWLL", "dsp_fein": "471234567"},
+        "contacts": [
+            _contact("DSP", "Maria Gomez", "maria@swiftlane.example", "512-555-0142",
+                     "1200 Cedar Ave", "Austin", "TX", "78701"),
+            _contact("Accounts Payable", "Tom Reyes", "ap@swiftlane.example", "512-555-0199",
+                     "1200 Cedar Ave", "Austin", "TX", "78701"),
+        ],
+        "billing_terms": {
+            "initial_term_period": "12 months",
+            "renewal_term_period": "12 months",
+            "billing_frequency": "Monthly",
+            "initial_term_start_date": "2025-02-01",
+            "initial_term_end_date": "2026-01-31",
+            "estimated_employee_count": 72,
+            "estimated_total_subscription_fee": 9840.0,
+            "one_time_setup_fee": 250.0,
+        },
+        "plan_catalog": _plan_catalog([
+            (500.0, 45.0, 4.5, 55.0, 5.5),
+            (750.0, 65.0, 4.0, 75.0, 5.0),
+            (1000.0, 95.0, 3.5, 105.0, 4.5),
+        ]),
+        "client_selected_plan": {
+            "payroll_frequency": "Weekly",
+            "selected_employee_range": "51-100",
+            "employee_range_min": 51,
+            "employee_range_max": 100,
+        },
+        "add_on_modules": [
+            {"module_name": "Benefits Admin", "fee_per_unit": 2.0, "unit_type": "Per Employee Per Payroll",
+             "units": 72, "subscription_fee": 7488.0, "subscription_fee_frequency": "Yearly"},
+            {"module_name": "ACA Reporting", "fee_per_unit": 12.0, "unit_type": "Per Employee Per Year",
+             "units": 72, "subscription_fee": 864.0, "subscription_fee_frequency": "Yearly"},
+        ],
+        "bank_account": {
+            "bank_name": "First Texas Bank",
+            "routing_number": "111000025",
+            "account_number": "000123456789",
+            "account_type": "Checking",
+        },
+        "additional_notes": "Payroll go-live targeted for the second week of February.",
+    },
+    "order_form_002": {
+        "client": {"dsp_name": "Northbound Delivery Inc", "dsp_code": "NBDI", "dsp_fein": "820987654"},
+        "contacts": [
+            _contact("DSP", "Aisha Khan", "aisha@northbound.example", "206-555-0110",
+                     "88 Harbor Way", "Seattle", "WA", "98101"),
+            _contact("Accounts Payable", "Lee Park", "billing@northbound.example", "206-555-0188",
+                     "88 Harbor Way", "Seattle", "WA", "98101"),
+        ],
+        "billing_terms": {
+            "initial_term_period": "6 months",
+            "renewal_term_period": "6 months",
+            "billing_frequency": "Monthly",
+            "initial_term_start_date": "2025-07-15",
+            "initial_term_end_date": "2026-01-14",
+            "estimated_employee_count": 130,
+            "estimated_total_subscription_fee": 15600.0,
+            "one_time_setup_fee": 400.0,
+        },
+        "plan_catalog": _plan_catalog([
+            (450.0, 40.0, 5.0, 50.0, 6.0),
+            (700.0, 60.0, 4.25, 70.0, 5.25),
+            (950.0, 90.0, 3.75, 100.0, 4.75),
+        ]),
+        "client_selected_plan": {
+            "payroll_frequency": "Bi-Weekly",
+            "selected_employee_range": "100+",
+            "employee_range_min": 101,
+            "employee_range_max": 10000,
+        },
+        "add_on_modules": [
+            {"module_name": "401(k)", "fee_per_unit": 1.5, "unit_type": "Per Employee Per Payroll",
+             "units": 130, "subscription_fee": 5070.0, "subscription_fee_frequency": "Yearly"},
+            {"module_name": "Garnishments", "fee_per_unit": 3.0, "unit_type": "Per Garnishment Per Payroll",
+             "units": 6, "subscription_fee": 468.0, "subscription_fee_frequency": "Yearly"},
+        ],
+        "bank_account": {
+            "bank_name": "Puget Sound Credit Union",
+            "routing_number": "325081403",
+            "account_number": "445566778899",
+            "account_type": "Savings",
+        },
+        "additional_notes": None,
+    },
+}
+
+
+def build_golden_set(version: str = "v1") -> Path:
+    """
+    Write the PDFs, expected JSON and manifest for a golden set version.
+    """
+    folder = GOLDEN_DIR / version
+    folder.mkdir(parents=True, exist_ok=True)
+    manifest = {"version": version, "cases": []}
+    for case_id, data in CASES.items():
+        (folder / f"{case_id}.pdf").write_bytes(render_order_form(data))
+        with open(folder / f"{case_id}.expected.json", "w", encoding="utf-8") as f:
+            json.dump(data, f, indent=2)
+            f.write("\n")
+        manifest["cases"].append({
+            "id": case_id,
+            "pdf": f"{case_id}.pdf",
+            "expected": f"{case_id}.expected.json",
+        })
+    with open(folder / "manifest.json", "w", encoding="utf-8") as f:
+        json.dump(manifest, f, indent=2)
+        f.write("\n")
+    return folder
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description="Build the golden order-form set.")
+    parser.add_argument("--version", default="v1")
+    args = parser.parse_args()
+    print(f"Golden set written to {build_golden_set(args.version)}")
+
+
+if __name__ == "__main__":
+    main()
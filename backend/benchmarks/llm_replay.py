@@ -0,0 +1,146 @@
+"""
+Record and replay Gemini responses so benchmarks run offline and deterministically.
+
+Responses are keyed by a hash of the model and the full prompt, so a
+recording is reused only for byte-identical requests. Changing the chunk
+size, compaction or prompt therefore needs a fresh recording run.
+
+FixtureClient answers from the golden set's expected JSON instead of
+Gemini (a perfect model), so recordings can be built without an API key.
+"""
+import hashlib
+import json
+import re
+import threading
+import time
+from pathlib import Path
+from types import SimpleNamespace
+from typing import Any, Dict, Optional
+
+from app.services.text_compaction import estimate_tokens
+from benchmarks.golden_set import PAGE_SECTIONS
+
+
+def recording_key(model: str, contents: Any) -> str:
+    """
+    Return the recording key for one generate_content request.
+    """
+    payload = f"{model}\n{contents}".encode("utf-8")
+    return hashlib.sha256(payload).hexdigest()
+
+
+class MissingRecordingError(LookupError):
+    """Raised in replay mode when a request was never recorded."""
+
+
+def _usage_dict(usage: Any) -> Dict[str, int]:
+    return {
+        "prompt_token_count": getattr(usage, "prompt_token_count", None) or 0,
+        "candidates_token_count": getattr(usage, "candidates_token_count", None) or 0,
+    }
+
+
+class _Models:
+    def __init__(self, generate_content):
+        self.generate_content = generate_content
+
+
+class RecordingClient:
+    """
+    Wraps a genai client, forwarding calls and saving each response
+    (text, token usage, latency) under the recordings folder.
+    """
+
+    def __init__(self, client: Any, folder: Path, source: str = "gemini"):
+        self._client = client
+        self.folder = Path(folder)
+        self.source = source
+        self.folder.mkdir(parents=True, exist_ok=True)
+        self.recorded = 0
+        self._lock = threading.Lock()
+        self.models = _Models(self._generate_content)
+
+    def _generate_content(self, model: str, contents: Any, config: Any = None):
+        started = time.perf_counter()
+        response = self._client.models.generate_content(model=model, contents=contents, config=config)
+        record = {
+            "source": self.source,
+            "model": model,
+            "text": response.text,
+            "usage": _usage_dict(response.usage_metadata),
+            "latency_s": round(time.perf_counter() - started, 4),
+        }
+        with open(self.folder / f"{recording_key(model, contents)}.json", "w", encoding="utf-8") as f:
+            json.dump(record, f, indent=2)
+            f.write("\n")
+        with self._lock:
+            self.recorded += 1
+        return response
+
+
+class ReplayClient:
+    """
+    Serves recorded responses in place of the genai client.
+
+    With simulate_latency the recorded call latency is slept before
+    returning, so latency figures stay comparable with a live run.
+    """
+
+    def __init__(self, folder: Path, simulate_latency: bool = False):
+        self.folder = Path(folder)
+        self.simulate_latency = simulate_latency
+        self.replayed = 0
+        self.missing = 0
+        self._lock = threading.Lock()
+        self.models = _Models(self._generate_content)
+
+    def _generate_content(self, model: str, contents: Any, config: Any = None):
+        path = self.folder / f"{recording_key(model, contents)}.json"
+        if not path.exists():
+            with self._lock:
+                self.missing += 1
+            raise MissingRecordingError(f"No recorded response for {model} request {path.stem[:12]}")
+
+        with open(path, "r", encoding="utf-8") as f:
+            record = json.load(f)
+        if self.simulate_latency:
+            time.sleep(record.get("latency_s", 0.0))
+        with self._lock:
+            self.replayed += 1
+        return SimpleNamespace(
+            text=record["text"],
+            usage_metadata=SimpleNamespace(**record.get("usage", {})),
+        )
+
+
+class FixtureClient:
+    """
+    Answers each chunk with the expected sections for the pages it contains,
+    as if the model extracted them perfectly. Sections the prompt asks to
+    leave empty (already parsed from tables) are returned as empty lists.
+    """
+
+    def __init__(self):
+        self.expected: Optional[Dict[str, Any]] = None
+        self.models = _Models(self._generate_content)
+
+    def set_case(self, expected: Dict[str, Any]) -> None:
+        self.expected = expected
+
+    def _generate_content(self, model: str, contents: Any, config: Any = None):
+        chunk = str(contents).split("PDF text:", 1)[-1]
+        skipped = re.search(r"- Return ([a-z_, ]+) as empty lists", str(contents))
+        skipped_sections = {name.strip() for name in skipped.group(1).split(",")} if skipped else set()
+
+        result = {}
+        for page_number in re.findall(r"=== PAGE (\d+) TEXT ===", chunk):
+            for section in PAGE_SECTIONS.get(int(page_number), []):
+                result[section] = [] if section in skipped_sections else self.expected.get(section)
+        text = json.dumps(result)
+        return SimpleNamespace(
+            text=text,
+            usage_metadata=SimpleNamespace(
+                prompt_token_count=estimate_tokens(str(contents)),
+                candidates_token_count=estimate_tokens(text),
+            ),
+        )
@@ -0,0 +1,306 @@
+"""
+Accuracy versus latency benchmark for extraction settings.
+
+Runs every golden-set PDF through PDFExtractionService across a grid of
+settings (chunk size, model, input compaction, table parser) and reports
+field-level precision/recall next to latency, Gemini call count and
+token usage for each grid point.
+
+Modes:
+    replay          serve recorded responses (offline, deterministic; default)
+    record          call Gemini and save responses for later replay
+    record-fixture  save fixture responses (the expected JSON) for later replay
+    fixture         answer from the expected JSON without recording
+    live            call Gemini without recording
+
+The committed recordings under golden/<version>/recordings cover the
+default grid with default settings and come from the fixture (source
+"fixture" in each file). They measure what the pipeline itself loses
+(chunking, compaction, table parsing, merging) with a perfect model. Re-run
+with --mode record and a real GOOGLE_API_KEY for real-model numbers. Any
+grid point with a failed case, such as a missing recording, is reported as
+invalid and the run exits non-zero.
+
+Usage:
+    python -m benchmarks.run_benchmark [--mode replay] [--chunk-sizes 2000,5000]
+        [--models gemini-2.5-flash] [--compaction on,off] [--table-parser on,off]
+        [--report report.json]
+"""
+import argparse
+import itertools
+import json
+import re
+import statistics
+import sys
+import time
+from datetime import datetime
+from pathlib import Path
+from typing import Any, Dict, List, Optional, Tuple
+
+from app.core.config import settings
+from app.services import gemini_service
+from app.services.llm_metrics import llm_metrics
+from app.services.pdf_extraction_service import PDFExtractionService
+from benchmarks.golden_set import GOLDEN_DIR
+from benchmarks.llm_replay import FixtureClient, RecordingClient, ReplayClient
+
+# List sections are matched record by record on these keys rather than by position.
+LIST_KEYS = {
+    "contacts": "contact_type",
+    "plan_catalog": "employee_range_label",
+    "add_on_modules": "module_name",
+}
+IGNORED_FIELDS = {"section_tiers"}
+
+DATE_FORMATS = ("%Y-%m-%d", "%m/%d/%Y", "%m-%d-%Y", "%B %d, %Y", "%b %d, %Y")
+
+
+# ---------- FIELD SCORING ----------
+
+def normalize_value(value: Any) -> Any:
+    """
+    Normalize a leaf value so formatting differences do not count as errors:
+    numbers are rounded, dates become ISO, digit strings (phone, FEIN,
+    routing numbers) keep only digits and other strings are case-folded.
+    """
+    if isinstance(value, bool):
+        return value
+    if isinstance(value, (int, float)):
+        return round(float(value), 2)
+    if not isinstance(value, str):
+        return value
+
+    text = " ".join(value.split())
+    for date_format in DATE_FORMATS:
+        try:
+            return datetime.strptime(text, date_format).date().isoformat()
+        except ValueError:
+            pass
+    if re.fullmatch(r"[\d\s()+\-.]+", text) and re.search(r"\d", text):
+        return re.sub(r"\D", "", text)
+    money = re.fullmatch(r"\$?\s*([\d,]+(?:\.\d+)?)", text)
+    if money:
+        return round(float(money.group(1).replace(",", "")), 2)
+    return text.casefold()
+
+
+def flatten_fields(data: Any, prefix: str = "") -> Dict[str, Any]:
+    """
+    Flatten OrderFormData-shaped data into {field path: normalized value},
+    dropping empty values.
+    """
+    fields = {}
+    if isinstance(data, dict):
+        for key, value in data.items():
+            if not prefix and key in IGNORED_FIELDS:
+                continue
+            path = f"{prefix}.{key}" if prefix else key
+            if isinstance(value, list) and key in LIST_KEYS:
+                for index, item in enumerate(value):
+                    if not isinstance(item, dict):
+                        continue
+                    label = item.get(LIST_KEYS[key])
+                    item_key = normalize_value(label) if label not in (None, "") else f"#{index}"
+                    fields.update(flatten_fields(item, f"{path}[{item_key}]"))
+            else:
+                fields.update(flatten_fields(value, path))
+    elif isinstance(data, list):
+        for index, item in enumerate(data):
+            fields.update(flatten_fields(item, f"{prefix}[{index}]"))
+    elif data not in (None, ""):
+        fields[prefix] = normalize_value(data)
+    return fields
+
+
+def score_fields(expected: Dict[str, Any], actual: Dict[str, Any]) -> Dict[str, int]:
+    """
+    Count correct, predicted and expected non-empty fields for one document.
+    """
+    expected_fields = flatten_fields(expected)
+    actual_fields = flatten_fields(actual)
+    correct = sum(
+        1 for path, value in actual_fields.items()
+        if path in expected_fields and expected_fields[path] == value
+    )
+    return {"correct": correct, "predicted": len(actual_fields), "expected": len(expected_fields)}
+
+
+def _ratio(numerator: float, denominator: float) -> float:
+    return round(numerator / denominator, 4) if denominator else 0.0
+
+
+# ---------- GRID RUN ----------
+
+def load_cases(version: str) -> Tuple[Path, List[Dict[str, Any]]]:
+    folder = GOLDEN_DIR / version
+    with open(folder / "manifest.json", "r", encoding="utf-8") as f:
+        manifest = json.load(f)
+    return folder, manifest["cases"]
+
+
+def _usage_totals(snapshot: Dict) -> Dict[str, float]:
+    totals = {"calls": 0, "errors": 0, "input_tokens": 0, "output_tokens": 0, "cost_usd": 0.0}
+    for counters in snapshot["models"].values():
+        for key in totals:
+            totals[key] += counters[key]
+    return totals
+
+
+def run_grid_point(
+    folder: Path,
+    cases: List[Dict[str, Any]],
+    chunk_size: int,
+    model: str,
+    compaction: bool,
+    table_parser: bool,
+    fixture: Optional[FixtureClient] = None,
+) -> Dict[str, Any]:
+    """
+    Extract every case with one combination of settings and return its scores.
+    Gemini errors (including missing replay recordings) fail the case rather
+    than scoring the fallback structure, and mark the row invalid.
+    """
+    settings.chunk_size = chunk_size
+    settings.gemini_model = model
+    settings.input_compaction_enabled = compaction
+    settings.table_parser_enabled = table_parser
+
+    totals = {"correct": 0, "predicted": 0, "expected": 0}
+    latencies = []
+    failures = 0
+    usage_before = _usage_totals(llm_metrics.snapshot())
+
+    for case in cases:
+        with open(folder / case["expected"], "r", encoding="utf-8") as f:
+            expected = json.load(f)
+        if fixture is not None:
+            fixture.set_case(expected)
+        # Cached chunk results would hide the cost of the settings under test.
+        gemini_service.chunk_cache.clear()
+        started = time.perf_counter()
+        try:
+            _, actual = PDFExtractionService.extract_order_form_data(
+                str(folder / case["pdf"]), raise_on_llm_error=True
+            )
+        except Exception as e:
+            print(f"  {case['id']}: extraction failed: {e}")
+            failures += 1
+            actual = {}
+        latencies.append(time.perf_counter() - started)
+        for key, value in score_fields(expected, actual).items():
+            totals[key] += value
+
+    usage_after = _usage_totals(llm_metrics.snapshot())
+    usage = {key: usage_after[key] - usage_before[key] for key in usage_after}
+    precision = _ratio(totals["correct"], totals["predicted"])
+    recall = _ratio(totals["correct"], totals["expected"])
+    return {
+        "chunk_size": chunk_size,
+        "model": model,
+        "compaction": compaction,
+        "table_parser": table_parser,
+        "documents": len(cases),
+        "failures": failures,
+        "valid": failures == 0 and usage["errors"] == 0,
+        "precision": precision,
+        "recall": recall,
+        "f1": _ratio(2 * precision * recall, precision + recall),
+        "avg_latency_s": round(statistics.mean(latencies), 4) if latencies else 0.0,
+        "max_latency_s": round(max(latencies), 4) if latencies else 0.0,
+        "llm_calls": usage["calls"],
+        "llm_errors": usage["errors"],
+        "input_tokens": usage["input_tokens"],
+        "output_tokens": usage["output_tokens"],
+        "cost_usd": round(usage["cost_usd"], 6),
+    }
+
+
+def print_report(rows: List[Dict[str, Any]]) -> None:
+    columns = [
+        ("chunk_size", "chunk"), ("model", "model"), ("compaction", "compact"),
+        ("table_parser", "tables"), ("precision", "prec"), ("recall", "recall"),
+        ("f1", "f1"), ("avg_latency_s", "avg_s"), ("llm_calls", "calls"),
+        ("llm_errors", "errors"), ("input_tokens", "in_tok"), ("output_tokens", "out_tok"),
+        ("failures", "failed"), ("valid", "valid"),
+    ]
+    table = [[header for _, header in columns]]
+    for row in rows:
+        table.append([
+            ("yes" if row[key] else "NO") if key == "valid"
+            else ("on" if row[key] else "off") if isinstance(row[key], bool) else str(row[key])
+            for key, _ in columns
+        ])
+    widths = [max(len(line[index]) for line in table) for index in range(len(columns))]
+    for line in table:
+        print("  ".join(cell.ljust(width) for cell, width in zip(line, widths)))
+
+
+def _parse_list(value: str) -> List[str]:
+    return [item.strip() for item in value.split(",") if item.strip()]
+
+
+def _parse_switch(value: str) -> List[bool]:
+    return [item.lower() in ("on", "true", "1") for item in _parse_list(value)]
+
+
+def main(argv: Optional[List[str]] = None) -> int:
+    parser = argparse.ArgumentParser(description="Golden-set accuracy vs latency benchmark.")
+    parser.add_argument("--version", default="v1", help="Golden set version folder")
+    parser.add_argument("--mode", choices=["replay", "record", "record-fixture", "fixture", "live"], default="replay")
+    parser.add_argument("--simulate-latency", action="store_true",
+                        help="In replay mode, sleep for each recorded call latency")
+    parser.add_argument("--chunk-sizes", default=str(settings.chunk_size))
+    parser.add_argument("--models", default=settings.gemini_model)
+    parser.add_argument("--compaction", default="on,off")
+    parser.add_argument("--table-parser", default="on,off")
+    parser.add_argument("--report", type=Path, help="Write the results as JSON to this path")
+    args = parser.parse_args(argv)
+
+    folder, cases = load_cases(args.version)
+    recordings = folder / "recordings"
+    fixture = FixtureClient() if args.mode in ("fixture", "record-fixture") else None
+    if args.mode == "replay":
+        gemini_service.client = ReplayClient(recordings, simulate_latency=args.simulate_latency)
+    elif args.mode == "record":
+        gemini_service.client = RecordingClient(gemini_service.client, recordings)
+    elif args.mode == "record-fixture":
+        gemini_service.client = RecordingClient(fixture, recordings, source="fixture")
+    elif args.mode == "fixture":
+        gemini_service.client = fixture
+
+    # Hedged duplicates and escalations would blur the per-setting numbers.
+    settings.llm_hedging_enabled = False
+    settings.llm_cascade_enabled = False
+
+    grid = itertools.product(
+        [int(size) for size in _parse_list(args.chunk_sizes)],
+        _parse_list(args.models),
+        _parse_switch(args.compaction),
+        _parse_switch(args.table_parser),
+    )
+    rows = []
+    for chunk_size, model, compaction, table_parser in grid:
+        print(f"Running chunk_size={chunk_size} model={model} "
+              f"compaction={compaction} table_parser={table_parser}")
+        rows.append(run_grid_point(folder, cases, chunk_size, model, compaction, table_parser, fixture))
+
+    print()
+    print_report(rows)
+    if isinstance(gemini_service.client, ReplayClient) and gemini_service.client.missing:
+        print(f"\n{gemini_service.client.missing} request(s) had no recording; "
+              f"run with --mode record or record-fixture to capture them.")
+    invalid = sum(1 for row in rows if not row["valid"])
+    if invalid:
+        print(f"\n{invalid} grid point(s) are invalid: failed cases are scored as empty, "
+              f"so their accuracy figures are not comparable.", file=sys.stderr)
+
+    if args.report:
+        report = {"version": args.version, "mode": args.mode, "results": rows}
+        with open(args.report, "w", encoding="utf-8") as f:
+            json.dump(report, f, indent=2)
+        print(f"\nReport written to {args.report}")
+    return 1 if invalid else 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())